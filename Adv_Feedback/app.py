@@ -5,14 +5,30 @@
 
 import streamlit as st
 import pandas as pd
+import numpy as np
 import sqlite3
+import csv
+import functools
+import json
+import logging
+import os
+import queue
+import re
+import threading
+import time
+from collections import Counter, OrderedDict, deque, namedtuple
+from concurrent.futures import Future
+from contextlib import contextmanager
 from pathlib import Path
-from datetime import datetime
+from datetime import date, datetime, timedelta
 import base64
-from io import BytesIO
+from io import BytesIO, TextIOWrapper
 
 import plotly.express as px
-import plotly.graph_objects as go
+from PIL import Image
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+from feedback_errors import FeedbackClosed
 
 # -----------------------------
 # PAGE CONFIG
@@ -23,10 +39,111 @@ st.set_page_config(
 )
 
 BASE_DIR = Path(__file__).parent
-STUDENTS_DIR = BASE_DIR / "students_list"
-FACULTY_DIR = BASE_DIR / "faculty_list"
-DB_PATH = BASE_DIR / "feedback.db"
+# Overridable so scripts (benchmark.py) can run against synthetic data
+STUDENTS_DIR = Path(os.environ.get("SJCET_STUDENTS_DIR", BASE_DIR / "students_list"))
+FACULTY_DIR = Path(os.environ.get("SJCET_FACULTY_DIR", BASE_DIR / "faculty_list"))
+DB_PATH = Path(os.environ.get("SJCET_DB_PATH", BASE_DIR / "feedback.db"))
+# One SQLite file per closed feedback cycle
+ARCHIVE_DIR = DB_PATH.parent / "feedback_archive"
 LOGO_PATH = BASE_DIR / "sjcet_logo.png"
+ROSTER_SNAPSHOT_DIR = Path(os.environ.get("SJCET_ROSTER_CACHE_DIR", BASE_DIR / ".roster_cache"))
+# Bump when read_student_file/read_faculty_file change what they produce
+ROSTER_SNAPSHOT_VERSION = 1
+
+logger = logging.getLogger("sjcet_feedback")
+if not logger.handlers:
+    _handler = logging.StreamHandler()
+    _handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s"))
+    logger.addHandler(_handler)
+    logger.setLevel(logging.INFO)
+
+# Group-commit submissions through a background writer thread (set to 0 to write inline)
+BATCH_WRITES = os.environ.get("SJCET_BATCH_WRITES", "1") == "1"
+
+def shared_resource(func=None, *, max_entries=None):
+    """``st.cache_resource`` that also serves threads without a script context.
+
+    The feedback writer and CLI scripts reuse what a script thread cached, else compute it once.
+    """
+    def decorate(fn):
+        cached = st.cache_resource(max_entries=max_entries, show_spinner=False)(fn)
+        memo = OrderedDict()
+        lock = threading.Lock()
+
+        def remember(args, value):
+            memo[args] = value
+            memo.move_to_end(args)
+            if max_entries is not None and len(memo) > max_entries:
+                memo.popitem(last=False)
+
+        @functools.wraps(fn)
+        def wrapper(*args):
+            if get_script_run_ctx(suppress_warning=True) is not None:
+                value = cached(*args)
+                # st.cache_resource always misses without a script context
+                with lock:
+                    remember(args, value)
+                return value
+            with lock:
+                if args not in memo:
+                    remember(args, fn(*args))
+                return memo[args]
+
+        return wrapper
+
+    return decorate(func) if func is not None else decorate
+
+# -----------------------------
+# TIMING
+# -----------------------------
+Span = namedtuple("Span", ["name", "label", "started_at", "duration_ms"])
+
+class SpanRecorder:
+    """Ring buffer of recent timed spans, shared by every session in the process."""
+
+    def __init__(self, max_spans=5000):
+        self._spans = deque(maxlen=max_spans)
+        self._lock = threading.Lock()
+
+    def add(self, span):
+        with self._lock:
+            self._spans.append(span)
+
+    def snapshot(self):
+        with self._lock:
+            return list(self._spans)
+
+    def clear(self):
+        with self._lock:
+            self._spans.clear()
+
+@shared_resource
+def span_recorder():
+    return SpanRecorder()
+
+@contextmanager
+def timed_span(name, label=""):
+    """Record how long the block takes (also when it raises, e.g. st.rerun)."""
+    started_at = time.time()
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        span_recorder().add(Span(name, label, started_at, (time.perf_counter() - start) * 1000))
+
+def timed(func=None, *, name=None):
+    """Decorator form of timed_span; the span is named after the function by default."""
+    def decorate(fn):
+        span_name = name or fn.__name__
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with timed_span(span_name):
+                return fn(*args, **kwargs)
+
+        return wrapper
+
+    return decorate(func) if func is not None else decorate
 
 # -----------------------------
 # WHITE UI + MOBILE CSS
@@ -117,13 +234,6 @@ input::placeholder, textarea::placeholder {
     color: #8B4513 !important;
 }
 
-/* Red DOB warning */
-.warning-dob {
-    color: #d00000 !important;
-    font-size: 16px;
-    font-weight: 700;
-}
-
 /* Mobile */
 @media (max-width: 768px) {
     input, textarea, select, .stButton > button {
@@ -132,46 +242,279 @@ input::placeholder, textarea::placeholder {
 }
 </style>
 """
-st.markdown(CSS, unsafe_allow_html=True)
+
+@shared_resource
+def page_css():
+    """CSS with comments and extra whitespace stripped, computed once per process.
+
+    Still emitted on every rerun: Streamlit drops any element a rerun doesn't re-create.
+    """
+    css = re.sub(r"/\*.*?\*/", "", CSS, flags=re.S)
+    css = re.sub(r"\s+", " ", css)
+    return re.sub(r"\s*([{};,>])\s*", r"\1", css).strip()
+
+st.markdown(page_css(), unsafe_allow_html=True)
 
 # -----------------------------
 # EXPORT HELPERS
 # -----------------------------
-def render_export_buttons(df: pd.DataFrame, base_filename: str):
-    """Show Export to Excel/CSV and simple PDF buttons for a DataFrame."""
-    if df is None or df.empty:
+EXPORT_CHUNK_ROWS = 5000
+PDF_ROWS_PER_PAGE = 40
+PDF_MAX_COL_WIDTH = 40
+PDF_EMOJI_TEXT = {"😍": "Excellent", "🙂": "Good", "😐": "Average", "😣": "Poor", "❔": "-"}
+
+@contextmanager
+def open_export_rows(source):
+    """Yield (columns, chunks) for a DataFrame or an (sql, params) query.
+
+    Queries are read with fetchmany so large tables never become a DataFrame.
+    """
+    if isinstance(source, pd.DataFrame):
+        def frame_chunks():
+            for start in range(0, len(source), EXPORT_CHUNK_ROWS):
+                yield list(source.iloc[start:start + EXPORT_CHUNK_ROWS].itertuples(index=False, name=None))
+        yield [str(c) for c in source.columns], frame_chunks()
         return
 
-    csv_data = df.to_csv(index=False).encode("utf-8")
-    pdf_text = df.to_string(index=False)
-    pdf_bytes = pdf_text.encode("utf-8")
+    sql, params = source
+    with get_db().connection() as conn:
+        cur = conn.execute(sql, params)
+        def cursor_chunks():
+            while True:
+                rows = cur.fetchmany(EXPORT_CHUNK_ROWS)
+                if not rows:
+                    return
+                yield rows
+        yield [d[0] for d in cur.description], cursor_chunks()
+
+@timed
+def build_csv_export(source):
+    """CSV bytes written chunk by chunk, without an intermediate DataFrame."""
+    out = BytesIO()
+    text = TextIOWrapper(out, encoding="utf-8", newline="")
+    writer = csv.writer(text)
+    with open_export_rows(source) as (columns, chunks):
+        writer.writerow(columns)
+        for rows in chunks:
+            writer.writerows(rows)
+    text.flush()
+    text.detach()
+    return out.getvalue()
+
+def pdf_cell(value):
+    if value is None or (isinstance(value, float) and pd.isna(value)):
+        return ""
+    text = str(value)
+    for emoji, word in PDF_EMOJI_TEXT.items():
+        text = text.replace(emoji, word)
+    text = text.encode("latin-1", "replace").decode("latin-1")
+    return "".join(ch if ch.isprintable() else " " for ch in text)
+
+@timed
+def build_pdf_export(source, title):
+    """Paginated landscape A4 PDF with the rows laid out as a fixed-width table."""
+    import matplotlib
+    from matplotlib.backends.backend_pdf import PdfPages
+    from matplotlib.figure import Figure
+
+    out = BytesIO()
+    # Built-in PDF Courier: no font embedding and much faster text layout
+    pdf_fonts = {"pdf.use14corefonts": True, "font.family": "monospace", "font.monospace": ["Courier"]}
+    with matplotlib.rc_context(pdf_fonts), open_export_rows(source) as (columns, chunks), PdfPages(out) as pdf:
+        widths = None
+        page_lines = []
+        page_no = 0
+
+        def flush_page():
+            nonlocal page_no
+            page_no += 1
+            fig = Figure(figsize=(11.69, 8.27))
+            line_len = max(len(x) for x in [header] + page_lines)
+            size = max(4.0, min(9.0, 0.92 * 11.69 * 72 / (0.6 * line_len)))
+            fig.text(0.04, 0.96, title, fontsize=12, fontweight="bold", va="top")
+            fig.text(0.04, 0.91, "\n".join([header, "-" * len(header)] + page_lines),
+                     fontsize=size, va="top")
+            fig.text(0.96, 0.03, f"Page {page_no}", fontsize=8, ha="right")
+            pdf.savefig(fig)
+
+        for rows in chunks:
+            rows = [[pdf_cell(v) for v in r] for r in rows]
+            if widths is None:
+                # Column widths come from the header and the first chunk
+                widths = [
+                    min(PDF_MAX_COL_WIDTH, max([len(c)] + [len(r[i]) for r in rows]))
+                    for i, c in enumerate(columns)
+                ]
+                header = "  ".join(c[:w].ljust(w) for c, w in zip(columns, widths))
+            for r in rows:
+                page_lines.append("  ".join(v[:w].ljust(w) for v, w in zip(r, widths)))
+                if len(page_lines) == PDF_ROWS_PER_PAGE:
+                    flush_page()
+                    page_lines = []
+        if widths is None:
+            header = "  ".join(columns)
+        if page_lines or page_no == 0:
+            flush_page()
+    return out.getvalue()
+
+def render_export_buttons(source, base_filename: str):
+    """Export to CSV / PDF, building the file only when its button is clicked.
+
+    ``source`` is a DataFrame or an (sql, params) tuple streamed from the cursor in chunks.
+    """
+    if source is None or (isinstance(source, pd.DataFrame) and source.empty):
+        return
 
     col1, col2 = st.columns(2)
     with col1:
-        st.download_button(
-            label="⬇️ Export to Excel (CSV)",
-            data=csv_data,
-            file_name=f"{base_filename}.csv",
-            mime="text/csv",
-        )
+        if st.button("⬇️ Export to Excel (CSV)", key=f"export_csv_{base_filename}"):
+            st.download_button(
+                label="Download CSV",
+                data=build_csv_export(source),
+                file_name=f"{base_filename}.csv",
+                mime="text/csv",
+                key=f"download_csv_{base_filename}",
+            )
     with col2:
-        st.download_button(
-            label="⬇️ Export as PDF (simple)",
-            data=pdf_bytes,
-            file_name=f"{base_filename}.pdf",
-            mime="application/pdf",
-        )
+        if st.button("⬇️ Export as PDF", key=f"export_pdf_{base_filename}"):
+            st.download_button(
+                label="Download PDF",
+                data=build_pdf_export(source, base_filename.replace("_", " ").title()),
+                file_name=f"{base_filename}.pdf",
+                mime="application/pdf",
+                key=f"download_pdf_{base_filename}",
+            )
 
 # -----------------------------
 # DATABASE
 # -----------------------------
-def get_connection():
-    return sqlite3.connect(DB_PATH, check_same_thread=False)
-
-def init_db():
-    conn = get_connection()
-    cur = conn.cursor()
+def norm_section(sec):
+    """Sections are stored as '' (never NULL) for branches without sections."""
+    if sec is None or pd.isna(sec):
+        return ""
+    return str(sec)
+
+class ConnectionManager:
+    """Process-wide SQLite connection pool (WAL, synchronous=NORMAL, busy timeout).
+
+    A thread keeps one connection for a whole, possibly nested, ``connection()`` block.
+    """
+
+    # BEGIN IMMEDIATE taking longer than this counts as waiting for the write lock
+    LOCK_WAIT_THRESHOLD_S = 0.005
+
+    def __init__(self, path, busy_timeout_ms=10000):
+        self.path = str(path)
+        self.busy_timeout_ms = busy_timeout_ms
+        self._local = threading.local()
+        self._idle = []
+        self._lock = threading.Lock()
+        self._stats = {
+            "connections_opened": 0,
+            "calls": 0,
+            "query_time_s": 0.0,
+            "max_query_time_s": 0.0,
+            "transactions": 0,
+            "lock_waits": 0,
+            "lock_wait_s": 0.0,
+            "max_lock_wait_s": 0.0,
+            "lock_errors": 0,
+        }
 
+    def _open(self):
+        conn = sqlite3.connect(
+            self.path,
+            timeout=self.busy_timeout_ms / 1000,
+            check_same_thread=False,
+            isolation_level=None,
+        )
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(f"PRAGMA busy_timeout={int(self.busy_timeout_ms)}")
+        with self._lock:
+            self._stats["connections_opened"] += 1
+        return conn
+
+    @contextmanager
+    def connection(self):
+        """Yield this thread's connection, checking one out of the pool if needed."""
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            yield conn
+            return
+
+        with self._lock:
+            conn = self._idle.pop() if self._idle else None
+        if conn is None:
+            conn = self._open()
+        self._local.conn = conn
+        start = time.perf_counter()
+        try:
+            yield conn
+        except sqlite3.OperationalError as e:
+            if "locked" in str(e) or "busy" in str(e):
+                with self._lock:
+                    self._stats["lock_errors"] += 1
+            raise
+        finally:
+            elapsed = time.perf_counter() - start
+            self._local.conn = None
+            if conn.in_transaction:
+                conn.rollback()
+            with self._lock:
+                self._idle.append(conn)
+                self._stats["calls"] += 1
+                self._stats["query_time_s"] += elapsed
+                self._stats["max_query_time_s"] = max(self._stats["max_query_time_s"], elapsed)
+
+    @contextmanager
+    def transaction(self):
+        """Yield a connection inside BEGIN IMMEDIATE; commit on success, roll back on error."""
+        with self.connection() as conn:
+            if conn.in_transaction:
+                yield conn
+                return
+
+            start = time.perf_counter()
+            conn.execute("BEGIN IMMEDIATE")
+            waited = time.perf_counter() - start
+            with self._lock:
+                self._stats["transactions"] += 1
+                self._stats["lock_wait_s"] += waited
+                self._stats["max_lock_wait_s"] = max(self._stats["max_lock_wait_s"], waited)
+                if waited > self.LOCK_WAIT_THRESHOLD_S:
+                    self._stats["lock_waits"] += 1
+            try:
+                yield conn
+            except BaseException:
+                conn.rollback()
+                raise
+            conn.execute("COMMIT")
+
+    def stats(self):
+        """Snapshot of the pool counters (times in seconds).
+
+        ``lock_wait_s`` is time spent acquiring the write lock in BEGIN IMMEDIATE.
+        """
+        with self._lock:
+            out = dict(self._stats)
+            out["idle_connections"] = len(self._idle)
+        out["avg_query_time_s"] = out["query_time_s"] / out["calls"] if out["calls"] else 0.0
+        out["avg_lock_wait_s"] = out["lock_wait_s"] / out["transactions"] if out["transactions"] else 0.0
+        return out
+
+@shared_resource
+def get_db():
+    """Shared connection manager for every session; the schema is set up once per process."""
+    db = ConnectionManager(DB_PATH)
+    init_db(db)
+    return db
+
+def init_db(db):
+    with db.transaction() as conn:
+        create_schema(conn.cursor())
+
+def create_schema(cur):
     cur.execute("""
         CREATE TABLE IF NOT EXISTS feedback_questions(
             id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -186,17 +529,162 @@ def init_db():
             id INTEGER PRIMARY KEY AUTOINCREMENT,
             student_regd_no TEXT,
             branch_code TEXT,
-            section TEXT,
+            section TEXT NOT NULL DEFAULT '',
             faculty_name TEXT,
             subject TEXT,
             department TEXT,
             q_scores TEXT,
             comments TEXT,
-            created_at TEXT
+            created_at TEXT,
+            cycle_id INTEGER,
+            duration_s REAL
         )
     """)
 
-    conn.commit()
+    # Feedback cycles (terms); only the open one lives in `feedback`
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS feedback_cycles(
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL UNIQUE,
+            opened_at TEXT NOT NULL,
+            closed_at TEXT,
+            archive_file TEXT
+        )
+    """)
+    cur.execute("""
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_cycles_open
+        ON feedback_cycles((closed_at IS NULL)) WHERE closed_at IS NULL
+    """)
+
+    # One row per answered question; question_no is the 1-based position (Q1..Qn)
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS feedback_scores(
+            feedback_id INTEGER NOT NULL,
+            question_no INTEGER NOT NULL,
+            score INTEGER NOT NULL,
+            PRIMARY KEY (feedback_id, question_no)
+        ) WITHOUT ROWID
+    """)
+
+    # Running sum/count per faculty & question, kept in step with every submission
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS feedback_agg(
+            branch_code TEXT NOT NULL,
+            section TEXT NOT NULL DEFAULT '',
+            faculty_name TEXT NOT NULL,
+            subject TEXT NOT NULL,
+            question_no INTEGER NOT NULL,
+            score_sum INTEGER NOT NULL,
+            score_count INTEGER NOT NULL,
+            PRIMARY KEY (branch_code, section, faculty_name, subject, question_no)
+        ) WITHOUT ROWID
+    """)
+
+    # Responses per score (1-10) for each faculty & question, for medians, spread and trimming
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS feedback_hist(
+            branch_code TEXT NOT NULL,
+            section TEXT NOT NULL DEFAULT '',
+            faculty_name TEXT NOT NULL,
+            subject TEXT NOT NULL,
+            question_no INTEGER NOT NULL,
+            score INTEGER NOT NULL,
+            n INTEGER NOT NULL,
+            PRIMARY KEY (branch_code, section, faculty_name, subject, question_no, score)
+        ) WITHOUT ROWID
+    """)
+
+    # Submissions and score totals per faculty & day/week ('day' or 'week'; weeks start Monday)
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS feedback_trend(
+            branch_code TEXT NOT NULL,
+            section TEXT NOT NULL DEFAULT '',
+            faculty_name TEXT NOT NULL,
+            subject TEXT NOT NULL,
+            period TEXT NOT NULL,
+            bucket TEXT NOT NULL,
+            submissions INTEGER NOT NULL,
+            score_sum INTEGER NOT NULL,
+            score_count INTEGER NOT NULL,
+            PRIMARY KEY (branch_code, section, period, bucket, faculty_name, subject)
+        ) WITHOUT ROWID
+    """)
+
+    # Faculty/subjects each student has rated, for participation without scanning feedback
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS student_progress(
+            branch_code TEXT NOT NULL,
+            section TEXT NOT NULL DEFAULT '',
+            student_regd_no TEXT NOT NULL,
+            submitted INTEGER NOT NULL,
+            last_submitted_at TEXT,
+            PRIMARY KEY (branch_code, section, student_regd_no)
+        ) WITHOUT ROWID
+    """)
+
+    # Submissions the anomaly scan found suspicious; one row per reason
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS feedback_flags(
+            feedback_id INTEGER NOT NULL,
+            reason TEXT NOT NULL,
+            detail TEXT,
+            PRIMARY KEY (feedback_id, reason)
+        ) WITHOUT ROWID
+    """)
+
+    # Counters bumped whenever cached data (e.g. the question list) changes
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS app_meta(
+            key TEXT PRIMARY KEY,
+            value INTEGER NOT NULL DEFAULT 0
+        )
+    """)
+
+    cur.execute("PRAGMA user_version")
+    (schema_version,) = cur.fetchone()
+    if schema_version < 1:
+        migrate_q_scores(cur)
+        cur.execute("PRAGMA user_version = 1")
+    if schema_version < 2:
+        rebuild_feedback_agg(cur)
+        cur.execute("PRAGMA user_version = 2")
+    if schema_version < 3:
+        dedupe_feedback(cur)
+        cur.execute("PRAGMA user_version = 3")
+    if schema_version < 4:
+        migrate_feedback_cycles(cur)
+        cur.execute("PRAGMA user_version = 4")
+    if schema_version < 5:
+        rebuild_feedback_agg(cur)
+        cur.execute("PRAGMA user_version = 5")
+    if schema_version < 6:
+        cols = [r[1] for r in cur.execute("PRAGMA table_info(feedback)").fetchall()]
+        if "duration_s" not in cols:
+            cur.execute("ALTER TABLE feedback ADD COLUMN duration_s REAL")
+        cur.execute("PRAGMA user_version = 6")
+    if schema_version < 7:
+        rebuild_feedback_rollups(cur)
+        cur.execute("PRAGMA user_version = 7")
+
+    # One submission per student, faculty and subject; also serves feedback_exists
+    cur.execute("""
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_feedback_unique
+        ON feedback(student_regd_no, branch_code, section, faculty_name, subject)
+    """)
+    # Indexes behind the raw feedback viewer filters
+    cur.execute("DROP INDEX IF EXISTS idx_feedback_section")
+    cur.execute("""
+        CREATE INDEX IF NOT EXISTS idx_feedback_scope
+        ON feedback(branch_code, section, faculty_name, subject)
+    """)
+    cur.execute("""
+        CREATE INDEX IF NOT EXISTS idx_feedback_faculty
+        ON feedback(faculty_name, subject)
+    """)
+    cur.execute("""
+        CREATE INDEX IF NOT EXISTS idx_feedback_created
+        ON feedback(created_at)
+    """)
 
     cur.execute("SELECT COUNT(*) FROM feedback_questions")
     (count,) = cur.fetchone()
@@ -224,131 +712,906 @@ def init_db():
                 "INSERT INTO feedback_questions(question_text, order_no) VALUES(?,?)",
                 (q, i),
             )
-        conn.commit()
 
-    conn.close()
+def migrate_q_scores(cur):
+    """One-time copy of the legacy comma-joined q_scores into feedback_scores."""
+    cur.execute("""
+        SELECT id, q_scores FROM feedback
+        WHERE NOT EXISTS (SELECT 1 FROM feedback_scores s WHERE s.feedback_id = feedback.id)
+    """)
+    rows = []
+    for fid, q_scores in cur.fetchall():
+        for i, x in enumerate(str(q_scores or "").split(","), 1):
+            if x.strip():
+                rows.append((fid, i, int(x)))
+    cur.executemany(
+        "INSERT OR IGNORE INTO feedback_scores(feedback_id, question_no, score) VALUES (?,?,?)",
+        rows,
+    )
 
-def get_questions():
-    conn = get_connection()
-    df = pd.read_sql("SELECT * FROM feedback_questions ORDER BY order_no", conn)
-    conn.close()
-    return df
+def dedupe_feedback(cur):
+    """Normalise NULL sections to '' and drop duplicate submissions (oldest wins)."""
+    cur.execute("UPDATE feedback SET section='' WHERE section IS NULL")
+    cur.execute("""
+        DELETE FROM feedback WHERE id NOT IN (
+            SELECT MIN(id) FROM feedback
+            GROUP BY student_regd_no, branch_code, section, faculty_name, subject
+        )
+    """)
+    if cur.rowcount:
+        cur.execute("DELETE FROM feedback_scores WHERE feedback_id NOT IN (SELECT id FROM feedback)")
+        rebuild_feedback_agg(cur)
+
+def migrate_feedback_cycles(cur):
+    """v4: add feedback.cycle_id and put existing feedback into a first open cycle."""
+    cols = [r[1] for r in cur.execute("PRAGMA table_info(feedback)").fetchall()]
+    if "cycle_id" not in cols:
+        cur.execute("ALTER TABLE feedback ADD COLUMN cycle_id INTEGER")
+    cur.execute("SELECT MIN(created_at) FROM feedback")
+    (first,) = cur.fetchone()
+    cur.execute(
+        "INSERT INTO feedback_cycles(name, opened_at) VALUES (?, ?)",
+        ("Cycle 1", first or datetime.now().isoformat()),
+    )
+    cur.execute("UPDATE feedback SET cycle_id = ?", (cur.lastrowid,))
+
+def rebuild_feedback_agg(cur):
+    """Recompute feedback_agg and feedback_hist from the raw feedback_scores rows."""
+    cur.execute("DELETE FROM feedback_agg")
+    cur.execute("""
+        INSERT INTO feedback_agg(branch_code, section, faculty_name, subject,
+                                 question_no, score_sum, score_count)
+        SELECT f.branch_code, IFNULL(f.section,''), f.faculty_name, f.subject,
+               s.question_no, SUM(s.score), COUNT(*)
+        FROM feedback f
+        JOIN feedback_scores s ON s.feedback_id = f.id
+        GROUP BY f.branch_code, IFNULL(f.section,''), f.faculty_name, f.subject, s.question_no
+    """)
+    cur.execute("DELETE FROM feedback_hist")
+    cur.execute("""
+        INSERT INTO feedback_hist(branch_code, section, faculty_name, subject,
+                                  question_no, score, n)
+        SELECT f.branch_code, IFNULL(f.section,''), f.faculty_name, f.subject,
+               s.question_no, s.score, COUNT(*)
+        FROM feedback f
+        JOIN feedback_scores s ON s.feedback_id = f.id
+        GROUP BY f.branch_code, IFNULL(f.section,''), f.faculty_name, f.subject, s.question_no, s.score
+    """)
+    bump_data_version(cur, "feedback_version")
 
-def save_feedback(reg, branch, sec, fac, sub, dept, scores, comments):
-    conn = get_connection()
-    cur = conn.cursor()
-    s = ",".join(str(x) for x in scores)
+# SQL for the Monday starting a timestamp's week, matching week_start()
+ROLLUP_BUCKETS = {
+    "day": "date(f.created_at)",
+    "week": "date(f.created_at, 'weekday 0', '-6 days')",
+}
 
+def rebuild_feedback_rollups(cur):
+    """Recompute feedback_trend and student_progress from the raw feedback rows."""
+    cur.execute("DELETE FROM feedback_trend")
+    for period, bucket in ROLLUP_BUCKETS.items():
+        cur.execute(f"""
+            INSERT INTO feedback_trend(branch_code, section, faculty_name, subject, period, bucket,
+                                       submissions, score_sum, score_count)
+            SELECT f.branch_code, IFNULL(f.section,''), f.faculty_name, f.subject, ?, {bucket},
+                   COUNT(DISTINCT f.id), IFNULL(SUM(s.score), 0), COUNT(s.score)
+            FROM feedback f
+            LEFT JOIN feedback_scores s ON s.feedback_id = f.id
+            WHERE {bucket} IS NOT NULL
+            GROUP BY f.branch_code, IFNULL(f.section,''), f.faculty_name, f.subject, {bucket}
+        """, (period,))
+    cur.execute("DELETE FROM student_progress")
     cur.execute("""
-        INSERT INTO feedback(student_regd_no,branch_code,section,
-        faculty_name,subject,department,q_scores,comments,created_at)
-        VALUES (?,?,?,?,?,?,?,?,?)
-    """, (reg, branch, sec, fac, sub, dept, s, comments, datetime.now().isoformat()))
+        INSERT INTO student_progress(branch_code, section, student_regd_no, submitted, last_submitted_at)
+        SELECT branch_code, IFNULL(section,''), student_regd_no, COUNT(*), MAX(created_at)
+        FROM feedback
+        GROUP BY branch_code, IFNULL(section,''), student_regd_no
+    """)
+    bump_data_version(cur, "feedback_version")
 
-    conn.commit()
-    conn.close()
+def get_data_version(key):
+    with get_db().connection() as conn:
+        row = conn.execute("SELECT value FROM app_meta WHERE key=?", (key,)).fetchone()
+    return row[0] if row else 0
 
-def feedback_exists(reg, branch, sec, fac, sub):
-    conn = get_connection()
-    cur = conn.cursor()
+@timed
+def get_data_versions():
+    """All app_meta counters in one query, e.g. {'feedback_version': 12, ...}."""
+    with get_db().connection() as conn:
+        return dict(conn.execute("SELECT key, value FROM app_meta").fetchall())
+
+def bump_data_version(cur, key):
     cur.execute("""
-        SELECT COUNT(*) FROM feedback
-        WHERE student_regd_no=? AND branch_code=?
-        AND IFNULL(section,'') = IFNULL(?, '')
-        AND faculty_name=? AND subject=?
-    """, (reg, branch, sec, fac, sub))
-    (count,) = cur.fetchone()
-    conn.close()
-    return count > 0
-
-def get_feedback_for_section(branch, section):
-    conn = get_connection()
-    df = pd.read_sql_query("""
-        SELECT * FROM feedback
-        WHERE branch_code=?
-        AND IFNULL(section,'') = IFNULL(?, '')
-    """, conn, params=(branch, section))
-    conn.close()
+        INSERT INTO app_meta(key, value) VALUES (?, 1)
+        ON CONFLICT(key) DO UPDATE SET value = value + 1
+    """, (key,))
+
+Question = namedtuple("Question", ["id", "question_text", "order_no"])
+
+@shared_resource(max_entries=4)
+def load_questions(version):
+    """Question rows for one questions_version; a new version misses the cache."""
+    with get_db().connection() as conn:
+        rows = conn.execute(
+            "SELECT id, question_text, order_no FROM feedback_questions ORDER BY order_no"
+        ).fetchall()
+    return tuple(Question(*r) for r in rows)
+
+def get_questions():
+    """Questions in display order as immutable tuples, reloaded only after an edit."""
+    return load_questions(get_data_version("questions_version"))
+
+Cycle = namedtuple("Cycle", ["id", "name", "opened_at", "closed_at", "archive_file"])
+
+@shared_resource(max_entries=4)
+def load_cycles(version):
+    with get_db().connection() as conn:
+        rows = conn.execute(
+            "SELECT id, name, opened_at, closed_at, archive_file FROM feedback_cycles ORDER BY id"
+        ).fetchall()
+    return tuple(Cycle(*r) for r in rows)
+
+def get_cycles():
+    """All feedback cycles, oldest first."""
+    return load_cycles(get_data_version("cycles_version"))
+
+def get_open_cycle():
+    return next((c for c in get_cycles() if c.closed_at is None), None)
+
+def open_cycle(name):
+    """Start a new cycle; raises sqlite3.IntegrityError if one is open or the name is taken."""
+    with get_db().transaction() as conn:
+        conn.execute(
+            "INSERT INTO feedback_cycles(name, opened_at) VALUES (?, ?)",
+            (name, datetime.now().isoformat()),
+        )
+        bump_data_version(conn.cursor(), "cycles_version")
+
+# Copied into each archive; questions too, since they may be edited between cycles
+ARCHIVED_TABLES = (
+    "feedback", "feedback_scores", "feedback_agg", "feedback_hist", "feedback_flags",
+    "feedback_trend", "student_progress", "feedback_questions",
+)
+
+def close_cycle():
+    """Move the open cycle's feedback into its own SQLite file and close the cycle.
+
+    The live tables are emptied; archives stay queryable through ATTACH (see archived_cycle).
+    """
+    cycle = get_open_cycle()
+    if cycle is None:
+        raise RuntimeError("No feedback cycle is open.")
+    ARCHIVE_DIR.mkdir(exist_ok=True)
+    archive_file = f"feedback_cycle_{cycle.id}.db"
+
+    db = get_db()
+    with db.connection() as conn:
+        # ATTACH isn't allowed inside a transaction
+        conn.execute("ATTACH DATABASE ? AS archive", (str(ARCHIVE_DIR / archive_file),))
+        try:
+            with db.transaction():
+                for table in ARCHIVED_TABLES:
+                    conn.execute(f"DROP TABLE IF EXISTS archive.{table}")
+                    conn.execute(f"CREATE TABLE archive.{table} AS SELECT * FROM main.{table}")
+                conn.execute("""
+                    CREATE INDEX archive.idx_feedback_scope
+                    ON feedback(branch_code, section, faculty_name, subject)
+                """)
+                conn.execute("""
+                    CREATE INDEX archive.idx_feedback_agg_scope
+                    ON feedback_agg(branch_code, section)
+                """)
+                conn.execute("DELETE FROM main.feedback_agg")
+                conn.execute("DELETE FROM main.feedback_hist")
+                conn.execute("DELETE FROM main.feedback_flags")
+                conn.execute("DELETE FROM main.feedback_trend")
+                conn.execute("DELETE FROM main.student_progress")
+                conn.execute("DELETE FROM main.feedback_scores")
+                conn.execute("DELETE FROM main.feedback")
+                conn.execute(
+                    "UPDATE feedback_cycles SET closed_at=?, archive_file=? WHERE id=?",
+                    (datetime.now().isoformat(), archive_file, cycle.id),
+                )
+                bump_data_version(conn.cursor(), "feedback_version")
+                bump_data_version(conn.cursor(), "cycles_version")
+        finally:
+            conn.execute("DETACH DATABASE archive")
+    return cycle
+
+@contextmanager
+def archived_cycle(conn, cycle):
+    """Attach a closed cycle's archive as schema ``archive`` for the duration of the block."""
+    conn.execute("ATTACH DATABASE ? AS archive", (str(ARCHIVE_DIR / cycle.archive_file),))
+    try:
+        yield conn
+    finally:
+        conn.execute("DETACH DATABASE archive")
+
+def week_start(day):
+    """Monday of the week containing ``day``."""
+    return day - timedelta(days=day.weekday())
+
+def feedback_day(created_at):
+    try:
+        return datetime.fromisoformat(created_at).date()
+    except (TypeError, ValueError):
+        return None
+
+FEEDBACK_CLOSED_MESSAGE = "Feedback is closed at the moment. Please check back when the next cycle opens."
+
+@timed
+def insert_feedback_rows(cur, rows):
+    """Insert submissions inside the caller's transaction; one bool per row, False if already submitted.
+
+    Rows are (reg, branch, sec, fac, sub, dept, scores, comments, created_at, duration_s or None).
+    """
+    cur.execute("SELECT id FROM feedback_cycles WHERE closed_at IS NULL")
+    cycle = cur.fetchone()
+    if cycle is None:
+        raise FeedbackClosed("No feedback cycle is open.")
+
+    inserted = []
+    score_rows = []
+    # Summed per key first so a large batch touches each aggregate row once
+    agg = {}
+    hist = Counter()
+    trend = {}
+    progress = {}
+    for reg, branch, sec, fac, sub, dept, scores, comments, created_at, duration_s in rows:
+        sec = norm_section(sec)
+        cur.execute("""
+            INSERT INTO feedback(student_regd_no,branch_code,section,
+            faculty_name,subject,department,q_scores,comments,created_at,cycle_id,duration_s)
+            VALUES (?,?,?,?,?,?,?,?,?,?,?)
+            ON CONFLICT DO NOTHING
+        """, (reg, branch, sec, fac, sub, dept, ",".join(str(x) for x in scores), comments, created_at,
+              cycle[0], duration_s))
+        if cur.rowcount == 0:
+            inserted.append(False)
+            continue
+        fid = cur.lastrowid
+        inserted.append(True)
+        for i, x in enumerate(scores, 1):
+            score_rows.append((fid, i, int(x)))
+            total = agg.setdefault((branch, sec, fac, sub, i), [0, 0])
+            total[0] += int(x)
+            total[1] += 1
+            hist[(branch, sec, fac, sub, i, int(x))] += 1
+
+        day = feedback_day(created_at)
+        if day is not None:
+            for period, bucket in (("day", day), ("week", week_start(day))):
+                total = trend.setdefault((branch, sec, period, bucket.isoformat(), fac, sub), [0, 0, 0])
+                total[0] += 1
+                total[1] += sum(int(x) for x in scores)
+                total[2] += len(scores)
+        done = progress.setdefault((branch, sec, reg), [0, created_at])
+        done[0] += 1
+        done[1] = max(done[1] or "", created_at or "") or None
+
+    cur.executemany(
+        "INSERT INTO feedback_scores(feedback_id, question_no, score) VALUES (?,?,?)",
+        score_rows,
+    )
+    cur.executemany("""
+        INSERT INTO feedback_agg(branch_code, section, faculty_name, subject,
+                                 question_no, score_sum, score_count)
+        VALUES (?,?,?,?,?,?,?)
+        ON CONFLICT(branch_code, section, faculty_name, subject, question_no)
+        DO UPDATE SET score_sum = score_sum + excluded.score_sum,
+                      score_count = score_count + excluded.score_count
+    """, [(*key, total, count) for key, (total, count) in agg.items()])
+    cur.executemany("""
+        INSERT INTO feedback_hist(branch_code, section, faculty_name, subject,
+                                  question_no, score, n)
+        VALUES (?,?,?,?,?,?,?)
+        ON CONFLICT(branch_code, section, faculty_name, subject, question_no, score)
+        DO UPDATE SET n = n + excluded.n
+    """, [(*key, n) for key, n in hist.items()])
+    cur.executemany("""
+        INSERT INTO feedback_trend(branch_code, section, period, bucket, faculty_name, subject,
+                                   submissions, score_sum, score_count)
+        VALUES (?,?,?,?,?,?,?,?,?)
+        ON CONFLICT(branch_code, section, period, bucket, faculty_name, subject)
+        DO UPDATE SET submissions = submissions + excluded.submissions,
+                      score_sum = score_sum + excluded.score_sum,
+                      score_count = score_count + excluded.score_count
+    """, [(*key, *totals) for key, totals in trend.items()])
+    cur.executemany("""
+        INSERT INTO student_progress(branch_code, section, student_regd_no, submitted, last_submitted_at)
+        VALUES (?,?,?,?,?)
+        ON CONFLICT(branch_code, section, student_regd_no)
+        DO UPDATE SET submitted = submitted + excluded.submitted,
+                      last_submitted_at = MAX(IFNULL(last_submitted_at, ''), IFNULL(excluded.last_submitted_at, ''))
+    """, [(*key, n, last) for key, (n, last) in progress.items()])
+    if any(inserted):
+        bump_data_version(cur, "feedback_version")
+    return inserted
+
+class FeedbackWriter:
+    """Background thread that group-commits submissions from every session.
+
+    Each commit takes whatever is already queued (up to ``max_batch``); a Future resolves after it.
+    """
+
+    def __init__(self, db, max_batch=100):
+        self.db = db
+        self.max_batch = max_batch
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name="feedback-writer", daemon=True)
+        self._thread.start()
+
+    def submit(self, row):
+        fut = Future()
+        self._queue.put((row, fut))
+        return fut
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            while len(batch) < self.max_batch:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            self._flush(batch)
+
+    def _flush(self, batch):
+        try:
+            with self.db.transaction() as conn:
+                results = insert_feedback_rows(conn.cursor(), [row for row, _ in batch])
+        except Exception:
+            # Retry one by one so a single bad row doesn't fail everyone in the batch
+            for row, fut in batch:
+                try:
+                    with self.db.transaction() as conn:
+                        fut.set_result(insert_feedback_rows(conn.cursor(), [row])[0])
+                except Exception as e:
+                    fut.set_exception(e)
+            return
+        for (_, fut), ok in zip(batch, results):
+            fut.set_result(ok)
+
+@shared_resource
+def get_feedback_writer():
+    return FeedbackWriter(get_db())
+
+@timed
+def save_feedback(reg, branch, sec, fac, sub, dept, scores, comments, duration_s=None):
+    """Insert one submission; returns False if this student already rated fac/sub.
+
+    Returns only once the row is committed, whether written inline or batched.
+    """
+    row = (reg, branch, sec, fac, sub, dept, list(scores), comments, datetime.now().isoformat(), duration_s)
+    if BATCH_WRITES:
+        return get_feedback_writer().submit(row).result(timeout=60)
+
+    with get_db().transaction() as conn:
+        return insert_feedback_rows(conn.cursor(), [row])[0]
+
+@timed
+def save_feedback_many(reg, branch, sec, entries, duration_s=None):
+    """Insert several submissions by one student in one transaction; one bool per entry.
+
+    ``entries`` are (fac, sub, dept, scores, comments); ``duration_s`` is the time spent per entry.
+    """
+    now = datetime.now().isoformat()
+    rows = [
+        (reg, branch, sec, fac, sub, dept, list(scores), comments, now, duration_s)
+        for fac, sub, dept, scores, comments in entries
+    ]
+    with get_db().transaction() as conn:
+        return insert_feedback_rows(conn.cursor(), rows)
+
+@timed
+def submitted_pairs(reg, branch, sec):
+    """(faculty_name, subject) pairs this student has already rated, in one query."""
+    with get_db().connection() as conn:
+        rows = conn.execute("""
+            SELECT faculty_name, subject FROM feedback
+            WHERE student_regd_no=? AND branch_code=? AND section=?
+        """, (reg, branch, norm_section(sec))).fetchall()
+    return set(rows)
+
+@timed
+def feedback_exists(reg, branch, sec, fac, sub):
+    with get_db().connection() as conn:
+        (found,) = conn.execute("""
+            SELECT EXISTS(
+                SELECT 1 FROM feedback
+                WHERE student_regd_no=? AND branch_code=? AND section=?
+                AND faculty_name=? AND subject=?
+            )
+        """, (reg, branch, norm_section(sec), fac, sub)).fetchone()
+    return bool(found)
+
+# Raw feedback columns shown to staff (student identity hidden)
+RAW_FEEDBACK_COLUMNS = (
+    "id, branch_code, section, faculty_name, subject, department, q_scores, comments, created_at"
+)
+
+def feedback_filter(branch=None, section=None, faculty=None, subject=None, date_from=None, date_to=None):
+    """WHERE clause and params for the raw feedback viewer; None means no filter."""
+    clauses, params = [], []
+    if branch is not None:
+        clauses.append("branch_code=?")
+        params.append(branch)
+    if section is not None:
+        clauses.append("section=?")
+        params.append(norm_section(section))
+    if faculty is not None:
+        clauses.append("faculty_name=?")
+        params.append(faculty)
+    if subject is not None:
+        clauses.append("subject=?")
+        params.append(subject)
+    # created_at is ISO text, so date bounds compare lexically
+    if date_from is not None:
+        clauses.append("created_at >= ?")
+        params.append(date_from.isoformat())
+    if date_to is not None:
+        clauses.append("created_at < ?")
+        params.append(date.fromordinal(date_to.toordinal() + 1).isoformat())
+    where = " AND ".join(clauses) if clauses else "1=1"
+    return where, tuple(params)
+
+@timed
+def count_feedback(where, params):
+    with get_db().connection() as conn:
+        (n,) = conn.execute(f"SELECT COUNT(*) FROM feedback WHERE {where}", params).fetchone()
+    return n
+
+@timed
+def get_feedback_page(where, params, after_id=0, limit=50):
+    """One page of raw feedback with id > after_id (keyset pagination)."""
+    with get_db().connection() as conn:
+        df = pd.read_sql_query(f"""
+            SELECT {RAW_FEEDBACK_COLUMNS} FROM feedback
+            WHERE {where} AND id > ?
+            ORDER BY id
+            LIMIT ?
+        """, conn, params=(*params, after_id, limit))
+    return df
+
+@timed
+def get_section_histogram(branch, section, nq):
+    """Per (faculty, subject, question, score) response counts for a section, from feedback_hist."""
+    with get_db().connection() as conn:
+        df = pd.read_sql_query("""
+            SELECT faculty_name, subject, question_no, score, n
+            FROM feedback_hist
+            WHERE branch_code=? AND section=? AND question_no <= ? AND score BETWEEN 1 AND 10
+        """, conn, params=(branch, norm_section(section), nq))
     return df
 
+@timed
+def get_flagged_histogram(branch, section, nq):
+    """Like get_section_histogram, counting only flagged submissions."""
+    with get_db().connection() as conn:
+        df = pd.read_sql_query("""
+            SELECT f.faculty_name, f.subject, s.question_no, s.score, COUNT(*) AS n
+            FROM (SELECT DISTINCT feedback_id FROM feedback_flags) ff
+            JOIN feedback f ON f.id = ff.feedback_id
+            JOIN feedback_scores s ON s.feedback_id = f.id
+            WHERE f.branch_code=? AND f.section=? AND s.question_no <= ? AND s.score BETWEEN 1 AND 10
+            GROUP BY f.faculty_name, f.subject, s.question_no, s.score
+        """, conn, params=(branch, norm_section(section), nq))
+    return df
+
+@timed
+def get_flagged_aggregates(nq):
+    """Like get_all_aggregates, summing only flagged submissions."""
+    with get_db().connection() as conn:
+        df = pd.read_sql_query("""
+            SELECT f.branch_code, f.section, f.faculty_name, f.subject, s.question_no,
+                   SUM(s.score) AS score_sum, COUNT(*) AS score_count
+            FROM (SELECT DISTINCT feedback_id FROM feedback_flags) ff
+            JOIN feedback f ON f.id = ff.feedback_id
+            JOIN feedback_scores s ON s.feedback_id = f.id
+            WHERE s.question_no <= ?
+            GROUP BY f.branch_code, f.section, f.faculty_name, f.subject, s.question_no
+        """, conn, params=(nq,))
+    return df
+
+def subtract_flagged(df, flagged, value_cols):
+    """Take flagged submissions' sums/counts out of an aggregate frame.
+
+    Rows match on every column but ``value_cols``; rows whose count (the last one) drops to zero go.
+    """
+    if flagged.empty:
+        return df
+    keys = [c for c in df.columns if c not in value_cols]
+    out = df.merge(flagged, on=keys, how="left", suffixes=("", "_flagged"))
+    for c in value_cols:
+        out[c] = out[c] - out[f"{c}_flagged"].fillna(0).astype(out[c].dtype)
+    return out.loc[out[value_cols[-1]] > 0, list(df.columns)].reset_index(drop=True)
+
+# -----------------------------
+# ANOMALY FLAGS
+# -----------------------------
+FLAG_REASONS = {
+    "straight_line": "Same score for every question",
+    "too_fast": "Submitted faster than the questions can be read",
+    "outlier": "Far from the other ratings of this faculty/subject",
+}
+# Less time on the form than this per question counts as rushed
+MIN_SECONDS_PER_QUESTION = 1.0
+# A faculty/question needs this many responses before outliers are judged against it
+OUTLIER_MIN_RESPONSES = 10
+# Upper normal quantile for the outlier test (3.09 ~ 1 in 1000 genuine responses flagged)
+OUTLIER_Z = 3.09
+FLAG_SCAN_BATCH = 5000
+
+def chi2_quantile(k, z):
+    """Wilson-Hilferty approximation of the chi-square quantile with k degrees of freedom."""
+    k = np.asarray(k, dtype=float)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return k * (1 - 2 / (9 * k) + z * np.sqrt(2 / (9 * k))) ** 3
+
+def faculty_question_stats(nq):
+    """Per faculty/subject and question (n, mean, sd) from feedback_hist, keyed by a MultiIndex."""
+    with get_db().connection() as conn:
+        hist_df = pd.read_sql_query("""
+            SELECT branch_code, section, faculty_name, subject, question_no, score, n
+            FROM feedback_hist
+            WHERE question_no <= ? AND score BETWEEN 1 AND 10
+        """, conn, params=(nq,))
+    codes, keys = pd.MultiIndex.from_frame(
+        hist_df[["branch_code", "section", "faculty_name", "subject"]]
+    ).factorize()
+    hist = np.zeros((len(keys), nq, len(SCORE_VALUES)))
+    hist[codes, hist_df["question_no"].to_numpy() - 1, hist_df["score"].to_numpy() - 1] = hist_df["n"].to_numpy()
+    stats = histogram_stats(hist)
+    return keys, stats["n"], stats["mean"], stats["sd"]
+
+def flag_submissions(rows, score_rows, nq, fac_stats):
+    """[(feedback_id, reason, detail)] for (id, branch, section, faculty, subject, duration_s) rows sorted by id.
+
+    ``score_rows`` is an int array of their feedback_scores rows (feedback_id, question_no, score), question_no <= nq.
+    """
+    ids = [row[0] for row in rows]
+    fid, qno, score = score_rows.T
+    # Row of each score in the batch; scores of ids not in it (deleted feedback) are dropped
+    pos = np.minimum(np.searchsorted(ids, fid), len(ids) - 1)
+    mine = np.asarray(ids)[pos] == fid
+    scores = np.full((len(rows), nq), np.nan)
+    scores[pos[mine], qno[mine] - 1] = score[mine]
+    answered = ~np.isnan(scores)
+    n_answered = answered.sum(axis=1)
+    flags = []
+
+    lo = np.where(answered, scores, np.inf).min(axis=1)
+    hi = np.where(answered, scores, -np.inf).max(axis=1)
+    for r in np.flatnonzero((n_answered >= 2) & (lo == hi)):
+        flags.append((ids[r], "straight_line", f"all {int(lo[r])}"))
+
+    duration = np.array([np.nan if row[5] is None else row[5] for row in rows], dtype=float)
+    with np.errstate(invalid="ignore"):
+        fast = duration < MIN_SECONDS_PER_QUESTION * n_answered
+    for r in np.flatnonzero(fast):
+        flags.append((ids[r], "too_fast", f"{duration[r]:.0f}s for {n_answered[r]} questions"))
+
+    keys, n, mean, sd = fac_stats
+    idx = keys.get_indexer(pd.MultiIndex.from_tuples([row[1:5] for row in rows]))
+    known = idx >= 0
+    safe = np.where(known, idx, 0)
+    ok = answered & known[:, None] & (n[safe] >= OUTLIER_MIN_RESPONSES) & (sd[safe] > 0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        z2 = np.where(ok, ((scores - mean[safe]) / sd[safe]) ** 2, 0).sum(axis=1)
+    k = ok.sum(axis=1)
+    for r in np.flatnonzero((k >= 2) & (z2 > chi2_quantile(np.maximum(k, 1), OUTLIER_Z))):
+        flags.append((ids[r], "outlier", f"{np.sqrt(z2[r] / k[r]):.1f} SD from the mean on average"))
+    return flags
+
+def get_flags_checkpoint(conn):
+    row = conn.execute("SELECT value FROM app_meta WHERE key='flags_checkpoint'").fetchone()
+    return row[0] if row else 0
+
+@timed
+def scan_feedback_flags(batch_size=FLAG_SCAN_BATCH):
+    """Flag submissions added since the last scan; returns (scanned, flagged).
+
+    Only ids above the ``flags_checkpoint`` kept in app_meta are read.
+    """
+    db = get_db()
+    with db.connection() as conn:
+        checkpoint = get_flags_checkpoint(conn)
+        (pending,) = conn.execute("SELECT EXISTS(SELECT 1 FROM feedback WHERE id > ?)", (checkpoint,)).fetchone()
+    if not pending:
+        return 0, 0
+
+    nq = len(get_questions())
+    fac_stats = faculty_question_stats(nq)
+    scanned = flagged = 0
+    while True:
+        with db.connection() as conn:
+            rows = conn.execute("""
+                SELECT id, branch_code, section, faculty_name, subject, duration_s
+                FROM feedback WHERE id > ? ORDER BY id LIMIT ?
+            """, (checkpoint, batch_size)).fetchall()
+            if not rows:
+                break
+            score_rows = np.array(conn.execute("""
+                SELECT feedback_id, question_no, score FROM feedback_scores
+                WHERE feedback_id BETWEEN ? AND ? AND question_no <= ?
+            """, (rows[0][0], rows[-1][0], nq)).fetchall(), dtype=np.int64).reshape(-1, 3)
+        flags = flag_submissions(rows, score_rows, nq, fac_stats) if nq else []
+        checkpoint = rows[-1][0]
+        with db.transaction() as conn:
+            conn.executemany(
+                "INSERT OR IGNORE INTO feedback_flags(feedback_id, reason, detail) VALUES (?,?,?)", flags
+            )
+            # MAX() so a concurrent scan that got further isn't moved back
+            conn.execute("""
+                INSERT INTO app_meta(key, value) VALUES ('flags_checkpoint', ?)
+                ON CONFLICT(key) DO UPDATE SET value = MAX(value, excluded.value)
+            """, (checkpoint,))
+            if flags:
+                bump_data_version(conn.cursor(), "flags_version")
+        scanned += len(rows)
+        flagged += len({f[0] for f in flags})
+    return scanned, flagged
+
+def reset_feedback_flags():
+    """Forget every flag so the next scan starts from the first submission."""
+    with get_db().transaction() as conn:
+        conn.execute("DELETE FROM feedback_flags")
+        conn.execute("DELETE FROM app_meta WHERE key='flags_checkpoint'")
+        bump_data_version(conn.cursor(), "flags_version")
+
 # -----------------------------
 # LOAD CSV
 # -----------------------------
-STUDENT_FILE_CONFIG = [
-    ("II-CSD", None, "S_II-CSD.csv"),
-    ("II-CSE", "A", "S_II-CSE_A.csv"),
-    ("II-CSE", "B", "S_II-CSE_B.csv"),
-    ("II-CSE", "C", "S_II-CSE_C.csv"),
-    ("III-CSE", None, "S_III-CSE.csv"),
-    ("III-CSD", None, "S_lll-CSD.csv"),
-]
-
-FACULTY_FILE_CONFIG = [
-    ("II-CSD", None, "F_II-CSD.csv"),
-    ("II-CSE", "A", "F_II-CSE_A.csv"),
-    ("II-CSE", "B", "F_II-CSE_B.csv"),
-    ("II-CSE", "C", "F_II-CSE_C.csv"),
-    ("III-CSE", None, "F_III-CSE.csv"),
-    ("III-CSD", None, "F_lll-CSD.csv"),
-]
-
-@st.cache_data
+ROSTER_NAME_PATTERN = re.compile(r"^[SF]_([^_]+)(?:_([^_]+))?\.csv$", re.IGNORECASE)
+
+def parse_roster_filename(name):
+    """Map 'S_II-CSE_A.csv' -> ('II-CSE', 'A') and 'F_III-CSE.csv' -> ('III-CSE', None).
+
+    A leading run of lowercase 'l' reads as 'I' ('lll-CSD' is III-CSD); other names give None.
+    """
+    m = ROSTER_NAME_PATTERN.match(name)
+    if not m:
+        return None
+    branch = re.sub(r"^l+", lambda x: "I" * len(x.group()), m.group(1))
+    return branch, m.group(2)
+
+def discover_roster_files(directory, prefix):
+    """(branch, section, path) for every <prefix>_*.csv in directory, by filename."""
+    out = []
+    for p in sorted(directory.glob(f"{prefix}_*.csv")):
+        parsed = parse_roster_filename(p.name)
+        if parsed:
+            out.append((parsed[0], parsed[1], p))
+    return out
+
+def branch_sections(df):
+    """branch_code -> sorted tuple of sections ('' for a branch without sections)."""
+    pairs = df[["branch_code", "section"]].drop_duplicates()
+    out = {}
+    for b, sec in zip(pairs["branch_code"], pairs["section"]):
+        out.setdefault(b, set()).add(norm_section(sec))
+    return {b: tuple(sorted(v)) for b, v in sorted(out.items())}
+
+class RosterCache:
+    """Roster CSVs cached per file, keyed on (path, mtime, size), with a pickle snapshot for cold starts.
+
+    Only new or changed files are parsed again; ``combine`` runs only when something changed.
+    """
+
+    def __init__(self, directory, prefix, read_file, combine, snapshot_dir=ROSTER_SNAPSHOT_DIR):
+        self.directory = directory
+        self.prefix = prefix
+        self.read_file = read_file
+        self.combine = combine
+        self.snapshot_dir = snapshot_dir
+        self._files = {}
+        self._result = None
+        self._lock = threading.Lock()
+        # Incremented on every rebuild so dependent caches can key on it
+        self.generation = 0
+
+    def _snapshot_path(self, path):
+        return self.snapshot_dir / f"{path.name}.pkl"
+
+    def _load_snapshot(self, path, sig):
+        snap = self._snapshot_path(path)
+        if not snap.exists():
+            return None
+        try:
+            data = pd.read_pickle(snap)
+        except Exception:
+            logger.warning("Ignoring unreadable roster snapshot %s", snap)
+            return None
+        if data.get("version") != ROSTER_SNAPSHOT_VERSION or data.get("sig") != sig:
+            return None
+        return data["df"]
+
+    def _write_snapshot(self, path, sig, df):
+        try:
+            self.snapshot_dir.mkdir(exist_ok=True)
+            tmp = self._snapshot_path(path).with_suffix(".tmp")
+            pd.to_pickle({"version": ROSTER_SNAPSHOT_VERSION, "sig": sig, "df": df}, tmp)
+            os.replace(tmp, self._snapshot_path(path))
+        except OSError as e:
+            logger.warning("Could not write roster snapshot for %s: %s", path.name, e)
+
+    def get(self):
+        with self._lock:
+            start = time.perf_counter()
+            found = discover_roster_files(self.directory, self.prefix)
+            changed = self._result is None or len(found) != len(self._files)
+            files = {}
+            parsed = from_snapshot = 0
+            for branch, sec, path in found:
+                stat = path.stat()
+                sig = (stat.st_mtime_ns, stat.st_size)
+                cached = self._files.get(path)
+                if cached is None or cached[0] != sig:
+                    df = self._load_snapshot(path, sig)
+                    if df is not None:
+                        from_snapshot += 1
+                    else:
+                        try:
+                            df = optimize_roster_dtypes(self.read_file(path, branch, sec))
+                        except (OSError, ValueError, KeyError) as e:
+                            # Kept as None so the file isn't retried until it changes
+                            logger.warning("Skipping roster %s: %s", path.name, e)
+                        else:
+                            self._write_snapshot(path, sig, df)
+                            parsed += 1
+                    cached = (sig, df)
+                    changed = True
+                files[path] = cached
+            self._files = files
+            if changed:
+                self._result = self.combine([df for _, df in files.values() if df is not None])
+                self.generation += 1
+                logger.info(
+                    "Loaded %s roster: %d rows from %d files (%d parsed, %d from snapshot) in %.1f ms",
+                    self.prefix, len(self._result.df), len(files), parsed, from_snapshot,
+                    (time.perf_counter() - start) * 1000,
+                )
+            return self._result
+
+def optimize_roster_dtypes(df):
+    """Categorical branch/section columns; the rest stays as read."""
+    for col in ("branch_code", "section"):
+        df[col] = df[col].astype("category")
+    return df
+
+# CSV header -> column name, for the headers every roster file must have
+STUDENT_FILE_COLUMNS = {"Regd. No.": "regd_no", "Name": "name", "DOB": "dob"}
+FACULTY_FILE_COLUMNS = {
+    "S.No": "sno",
+    "Faculty Name": "faculty_name",
+    "Subject (Full Form)": "subject",
+    "Department": "department",
+}
+
+def require_columns(df, columns):
+    missing = [c for c in columns if c not in df.columns]
+    if missing:
+        raise ValueError("missing column(s): " + ", ".join(f'"{c}"' for c in missing))
+
+def read_student_file(path, branch, sec):
+    df = pd.read_csv(path)
+    require_columns(df, STUDENT_FILE_COLUMNS)
+    df["branch_code"] = branch
+    df["section"] = sec or ""
+    df.rename(columns=STUDENT_FILE_COLUMNS, inplace=True)
+    df["regd_no"] = df["regd_no"].astype(str).str.strip().str.upper()
+    df["dob"] = df["dob"].astype(str)
+    # Both readings of the DOB as date ordinals (0 = none), compact enough to snapshot
+    days = [sorted(d.toordinal() for d in parse_dob(x)) for x in df["dob"]]
+    df["dob_day1"] = np.array([d[0] if d else 0 for d in days], dtype="int32")
+    df["dob_day2"] = np.array([d[-1] if d else 0 for d in days], dtype="int32")
+    return df
+
+def read_faculty_file(path, branch, sec):
+    df = pd.read_csv(path, encoding="latin1")
+    require_columns(df, FACULTY_FILE_COLUMNS)
+    df["branch_code"] = branch
+    df["section"] = sec or ""
+    df.rename(columns=FACULTY_FILE_COLUMNS, inplace=True)
+    return df
+
+StudentRecord = namedtuple("StudentRecord", ["regd_no", "name", "branch_code", "section", "dob_days"])
+StudentRoster = namedtuple("StudentRoster", ["df", "index", "sections"])
+FacultyRecord = namedtuple("FacultyRecord", ["sno", "faculty_name", "subject", "department"])
+FacultyRoster = namedtuple("FacultyRoster", ["df", "sections", "by_section"])
+
+DOB_PATTERN = re.compile(r"(\d{1,4})[/\-.](\d{1,2})[/\-.](\d{1,4})")
+
+def parse_dob(value):
+    """All dates a DOB string can mean; an empty set if it can't be parsed.
+
+    DD/MM/YYYY and MM/DD/YYYY both apply (01/04/2005 is 1 April and 4 January); YYYY-MM-DD too.
+    """
+    m = DOB_PATTERN.fullmatch(str(value).strip())
+    if not m:
+        return frozenset()
+    a, b, c = (int(x) for x in m.groups())
+    if a > 31:
+        candidates = [(a, b, c)]
+    else:
+        candidates = [(c, b, a), (c, a, b)]
+    out = set()
+    for y, mth, d in candidates:
+        try:
+            out.add(date(y, mth, d))
+        except ValueError:
+            pass
+    return frozenset(out)
+
+def combine_students(frames):
+    """Student roster plus a (regd_no, branch_code, section) -> StudentRecord index."""
+    if frames:
+        df = optimize_roster_dtypes(pd.concat(frames, ignore_index=True))
+    else:
+        df = pd.DataFrame(columns=["regd_no", "name", "dob", "dob_day1", "dob_day2", "branch_code", "section"])
+
+    index = {}
+    for reg, name, branch, sec, d1, d2 in zip(
+        df["regd_no"], df["name"], df["branch_code"].astype(str), df["section"].astype(str),
+        df["dob_day1"].tolist(), df["dob_day2"].tolist(),
+    ):
+        index[(reg, branch, sec)] = StudentRecord(reg, name, branch, sec, (d1, d2))
+    return StudentRoster(df, index, branch_sections(df))
+
+def combine_faculty(frames):
+    """Faculty roster plus a (branch_code, section) -> tuple of FacultyRecord index."""
+    if frames:
+        df = optimize_roster_dtypes(pd.concat(frames, ignore_index=True))
+    else:
+        df = pd.DataFrame(columns=["sno", "faculty_name", "subject", "department", "branch_code", "section"])
+
+    by_section = {}
+    for sno, fac, sub, dept, branch, sec in zip(
+        df["sno"], df["faculty_name"], df["subject"], df["department"],
+        df["branch_code"].astype(str), df["section"].astype(str),
+    ):
+        by_section.setdefault((branch, sec), []).append(FacultyRecord(sno, fac, sub, dept))
+    by_section = {k: tuple(v) for k, v in by_section.items()}
+    return FacultyRoster(df, branch_sections(df), by_section)
+
+@shared_resource
+def student_roster_cache():
+    return RosterCache(STUDENTS_DIR, "S", read_student_file, combine_students)
+
+@shared_resource
+def faculty_roster_cache():
+    return RosterCache(FACULTY_DIR, "F", read_faculty_file, combine_faculty)
+
+@timed
 def load_students():
-    rows = []
-    for b, s, f in STUDENT_FILE_CONFIG:
-        p = STUDENTS_DIR / f
-        if not p.exists():
-            continue
-        df = pd.read_csv(p)
-        df["branch_code"] = b
-        df["section"] = s
-        df.rename(columns={"Regd. No.": "regd_no", "Name": "name", "DOB": "dob"}, inplace=True)
-        df["regd_no"] = df["regd_no"].astype(str).str.upper()
-        df["dob"] = df["dob"].astype(str)
-        rows.append(df)
-    return pd.concat(rows, ignore_index=True)
-
-@st.cache_data
+    return student_roster_cache().get()
+
+@timed
 def load_faculty():
-    rows = []
-    for b, s, f in FACULTY_FILE_CONFIG:
-        p = FACULTY_DIR / f
-        if not p.exists():
-            continue
-        df = pd.read_csv(p, encoding="latin1")
-        df["branch_code"] = b
-        df["section"] = s
-        df.rename(columns={
-            "S.No": "sno",
-            "Faculty Name": "faculty_name",
-            "Subject (Full Form)": "subject",
-            "Department": "department"
-        }, inplace=True)
-        rows.append(df)
-    return pd.concat(rows, ignore_index=True)
-
-students_df = load_students()
-faculty_df = load_faculty()
+    return faculty_roster_cache().get()
+
+students = load_students()
+students_df = students.df
+faculty = load_faculty()
+faculty_df = faculty.df
+
+def faculty_for_section(branch, sec):
+    """(sno, faculty, subject, department) records for one section, in roster order."""
+    return faculty.by_section.get((branch, norm_section(sec)), ())
+
+def section_faculty_df(branch, sec):
+    return pd.DataFrame(faculty_for_section(branch, sec), columns=FacultyRecord._fields)
 
 # -----------------------------
 # AUTH
 # -----------------------------
 def authenticate_student(reg, dob, branch, sec):
-    reg = reg.strip().upper()
-    dob = dob.strip()
-
-    d = students_df[
-        (students_df["regd_no"] == reg) &
-        (students_df["dob"] == dob) &
-        (students_df["branch_code"] == branch)
-    ]
-
-    if branch == "II-CSE":
-        d = d[d["section"] == sec]
-
-    if d.empty:
+    """Return the StudentRecord for a valid login, else None (O(1) dict lookup)."""
+    rec = students.index.get((reg.strip().upper(), branch, norm_section(sec)))
+    if rec is None:
         return None
-    return d.iloc[0]
+    if not any(d.toordinal() in rec.dob_days for d in parse_dob(dob)):
+        return None
+    return rec
 
 def auth_user(username, password, role):
     creds = {
@@ -361,14 +1624,34 @@ def auth_user(username, password, role):
 # -----------------------------
 # HEADER
 # -----------------------------
+LOGO_WIDTH_PX = 140
+
+@shared_resource(max_entries=2)
+def logo_data_uri(mtime_ns):
+    """The logo shrunk to 2x its display width, as a base64 palette PNG; None if unreadable.
+
+    ~15 KB instead of ~1.4 MB per rerun; keyed on the file's mtime so a new logo is picked up.
+    """
+    try:
+        with Image.open(LOGO_PATH) as im:
+            # FASTOCTREE only quantizes RGB(A); grayscale/16-bit logos are converted first
+            im = im.convert("RGBA")
+            im.thumbnail((LOGO_WIDTH_PX * 2, LOGO_WIDTH_PX * 8), Image.LANCZOS)
+            buf = BytesIO()
+            im.quantize(256, method=Image.Quantize.FASTOCTREE).save(buf, format="PNG", optimize=True)
+    except (OSError, ValueError) as e:
+        logger.warning("Could not load logo %s: %s", LOGO_PATH.name, e)
+        return None
+    return "data:image/png;base64," + base64.b64encode(buf.getvalue()).decode()
+
 def render_header():
-    if LOGO_PATH.exists():
-        b64 = base64.b64encode(LOGO_PATH.read_bytes()).decode()
+    logo = logo_data_uri(LOGO_PATH.stat().st_mtime_ns) if LOGO_PATH.exists() else None
+    if logo:
         st.markdown(
             f"""
             <div style="text-align:center;margin-top:18px;margin-bottom:5px;">
-                <img src="data:image/png;base64,{b64}"
-                     style="width:140px;margin-bottom:10px;" />
+                <img src="{logo}"
+                     style="width:{LOGO_WIDTH_PX}px;margin-bottom:10px;" />
                 <div class="app-title">SJCET Feedback System</div>
             </div>
             """,
@@ -386,16 +1669,11 @@ def student_login_panel():
     col1, col2 = st.columns(2)
     with col1:
         reg = st.text_input("Register Number")
-        dob = st.text_input("Date of Birth (exact as in sheet)", placeholder="e.g. 01/01/2005")
+        dob = st.text_input("Date of Birth", placeholder="DD/MM/YYYY")
     with col2:
-        branch = st.selectbox("Year & Branch", ["Select", "II-CSD", "II-CSE", "III-CSE", "III-CSD"])
-        sec = st.selectbox("Section", ["A","B","C"]) if branch=="II-CSE" else None
-
-    st.markdown("""
-        <div class="warning-dob">
-        ⚠️ If login fails, try swapping day & month (01/04/2005 → 04/01/2005)
-        </div>
-    """, unsafe_allow_html=True)
+        branch = st.selectbox("Year & Branch", ["Select"] + list(students.sections))
+        secs = [x for x in students.sections.get(branch, ()) if x]
+        sec = st.selectbox("Section", secs) if secs else None
 
     if st.button("Login as Student"):
         if branch == "Select":
@@ -407,10 +1685,10 @@ def student_login_panel():
             return None
         st.success("Login successful.")
         return {
-            "name": user["name"],
-            "regd_no": user["regd_no"],
-            "branch_code": user["branch_code"],
-            "section": user["section"]
+            "name": user.name,
+            "regd_no": user.regd_no,
+            "branch_code": user.branch_code,
+            "section": user.section
         }
 
     return None
@@ -418,39 +1696,128 @@ def student_login_panel():
 # -----------------------------
 # STUDENT DASHBOARD
 # -----------------------------
+@timed
 def student_dashboard(info):
     st.markdown(f"### Hi **{info['name']}**, please give your valuable feedback.")
 
     branch = info["branch_code"]
     sec = info["section"]
 
-    f = faculty_df[
-        (faculty_df["branch_code"] == branch) &
-        (faculty_df["section"].fillna("") == (sec or ""))
-    ]
+    if get_open_cycle() is None:
+        st.info(FEEDBACK_CLOSED_MESSAGE)
+        return
+
+    records = faculty_for_section(branch, sec)
     st.write("### Faculty for your section")
-    st.dataframe(f[["sno","faculty_name","subject","department"]])
+    st.dataframe(section_faculty_df(branch, sec), hide_index=True)
+    if not records:
+        st.info("No faculty listed for your section yet.")
+        return
+
+    mode = st.radio(
+        "Feedback mode", ["All pending faculty (one form)", "One faculty at a time"], horizontal=True
+    )
+    if mode == "One faculty at a time":
+        single_feedback_form(info, records)
+    else:
+        multi_feedback_form(info, records)
+
+def multi_feedback_form(info, records):
+    """Every faculty/subject still to be rated in one st.form, saved in one transaction.
+
+    Sliders inside a form don't rerun the script; only Submit does.
+    """
+    reg, branch, sec = info["regd_no"], info["branch_code"], info["section"]
+
+    notice = st.session_state.pop("feedback_notice", None)
+    if notice:
+        st.success(notice)
+
+    done = submitted_pairs(reg, branch, sec)
+    pending = [(i, r) for i, r in enumerate(records) if (r.faculty_name, r.subject) not in done]
+    st.caption(f"{len(records) - len(pending)} of {len(records)} submitted")
+    if not pending:
+        st.success("You have given feedback for all your faculty. Thank you!")
+        return
 
-    fname = st.selectbox("Select Faculty", f["faculty_name"].unique())
-    row = f[f["faculty_name"] == fname].iloc[0]
-    subject = row["subject"]
-    dept = row["department"]
+    qs = get_questions()
+    started = st.session_state.setdefault("mf_started_at", time.time())
+    with st.form("multi_feedback"):
+        st.caption("Open a faculty, rate them and tick \"Include in this submission\". "
+                   "Only ticked faculty are submitted, and a submission can't be changed later.")
+        for i, rec in pending:
+            with st.expander(f"{rec.faculty_name} – {rec.subject}", expanded=len(pending) == 1):
+                # Off by default, so untouched sliders are never submitted as ratings
+                st.checkbox("Include in this submission", value=False, key=f"mf_{i}_include")
+                for j, q in enumerate(qs):
+                    st.slider(q.question_text, 1, 10, 5, key=f"mf_{i}_q{j}")
+                st.text_area("Additional suggestions (optional)", key=f"mf_{i}_comments")
+        submitted = st.form_submit_button("Submit Feedback")
+
+    if submitted:
+        state = st.session_state
+        entries = [
+            (rec.faculty_name, rec.subject, rec.department,
+             [state[f"mf_{i}_q{j}"] for j in range(len(qs))], state[f"mf_{i}_comments"])
+            for i, rec in pending
+            if state[f"mf_{i}_include"]
+        ]
+        if not entries:
+            st.warning("Tick \"Include in this submission\" for each faculty you have rated.")
+            return
+        # The form's time is split evenly across the faculty rated in it
+        duration = (time.time() - started) / len(entries)
+        try:
+            saved = save_feedback_many(reg, branch, sec, entries, duration)
+        except FeedbackClosed:
+            # The cycle was closed after this form was drawn
+            st.info(FEEDBACK_CLOSED_MESSAGE)
+            return
+        del st.session_state["mf_started_at"]
+        names = ", ".join(f"{fac} – {sub}" for (fac, sub, *_), ok in zip(entries, saved) if ok)
+        st.session_state["feedback_notice"] = (
+            f"Thank you! Feedback recorded for {sum(saved)} faculty: {names}." if names
+            else "Feedback already submitted."
+        )
+        st.rerun()
+
+def single_feedback_form(info, records):
+    branch = info["branch_code"]
+    sec = info["section"]
+
+    # One option per faculty/subject, so a teacher's second subject can be rated too
+    rec = st.selectbox(
+        "Select Faculty", records,
+        format_func=lambda r: f"{r.faculty_name} – {r.subject}",
+    )
+    fname, subject, dept = rec.faculty_name, rec.subject, rec.department
 
     if feedback_exists(info["regd_no"], branch, sec, fname, subject):
         st.info("Feedback already submitted.")
         return
 
     qs = get_questions()
+    started_key = f"form_started_at_{fname}_{subject}"
+    started = st.session_state.setdefault(started_key, time.time())
     scores = []
-    for _, q in qs.iterrows():
-        sc = st.slider(q["question_text"], 1, 10, 5)
+    for q in qs:
+        sc = st.slider(q.question_text, 1, 10, 5)
         scores.append(sc)
 
     comments = st.text_area("Additional suggestions (optional)")
 
     if st.button("Submit Feedback"):
-        save_feedback(info["regd_no"], branch, sec, fname, subject, dept, scores, comments)
-        st.success("Thank you! Feedback recorded.")
+        duration = time.time() - started
+        try:
+            saved = save_feedback(info["regd_no"], branch, sec, fname, subject, dept, scores, comments, duration)
+        except FeedbackClosed:
+            st.info(FEEDBACK_CLOSED_MESSAGE)
+            return
+        if saved:
+            st.session_state.pop(started_key, None)
+            st.success("Thank you! Feedback recorded.")
+        else:
+            st.info("Feedback already submitted.")
 
 # -----------------------------
 # HELPER: EMOJI MAPPING
@@ -474,100 +1841,461 @@ def score_to_emoji(avg):
 # -----------------------------
 # HOD / PRINCIPAL HELPERS
 # -----------------------------
+ALL_SECTIONS = "All sections"
+
 def section_selector():
     col1, col2 = st.columns(2)
     with col1:
-        branch = st.selectbox("Select Branch", ["II-CSD","II-CSE","III-CSE","III-CSD"])
+        branch = st.selectbox("Select Branch", list(faculty.sections) + [ALL_SECTIONS])
     with col2:
-        sec = st.selectbox("Select Section", ["A","B","C"]) if branch=="II-CSE" else None
+        secs = [x for x in faculty.sections.get(branch, ()) if x]
+        sec = st.selectbox("Select Section", secs) if secs else None
     return branch, sec
 
-def build_faculty_summary_for_section(branch, sec):
-    """Compute faculty summary, question-wise averages, and overall ratings for a section."""
-    f = faculty_df[
-        (faculty_df["branch_code"] == branch) &
-        (faculty_df["section"].fillna("") == (sec or ""))
-    ]
+class LRUCache:
+    """Small thread-safe LRU map shared by all sessions."""
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self._lock:
+            if key not in self._data:
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return self._data[key]
+
+    def put(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+@shared_resource
+def summary_cache():
+    # Summaries plus their cached figures, a handful of entries per section
+    return LRUCache(max_entries=128)
+
+@timed
+def build_faculty_summary_for_section(branch, sec, trim=0.0, exclude_flagged=False):
+    """Faculty summary for a section, cached until feedback, questions, flags or the roster change.
+
+    The returned DataFrames are shared between sessions; callers must not modify them.
+    """
+    if exclude_flagged:
+        scan_feedback_flags()
+    return cached_summary(
+        (branch, norm_section(sec), trim, exclude_flagged),
+        compute_faculty_summary, branch, sec, trim, exclude_flagged,
+    )
 
-    fb = get_feedback_for_section(branch, sec)
-    if fb.empty or f.empty:
-        return f, fb, None, None, None
+@timed
+def build_college_summary(exclude_flagged=False):
+    """Ranked faculty table across every branch & section."""
+    if exclude_flagged:
+        scan_feedback_flags()
+    return cached_summary((ALL_SECTIONS, exclude_flagged), compute_college_summary, exclude_flagged)
+
+def cached_summary(scope, compute, *args):
+    versions = get_data_versions()
+    key = scope + (
+        versions.get("feedback_version", 0),
+        versions.get("questions_version", 0),
+        versions.get("flags_version", 0),
+        faculty_roster_cache().generation,
+        student_roster_cache().generation,
+    )
+    cache = summary_cache()
+    result = cache.get(key)
+    if result is None:
+        result = compute(*args)
+        cache.put(key, result)
+    return result
+
+SCORE_VALUES = np.arange(1, 11)
+# Share of responses dropped from each end for the trimmed-means option
+TRIM_FRACTION = 0.1
+Z_95 = 1.96
+
+def histogram_stats(hist, trim=0.0):
+    """Response-weighted n, mean, sd, median, ci_low, ci_high of score histograms (``hist[..., s]`` counts ``s + 1``).
+
+    With ``trim`` the mean is trimmed and its interval winsorized; cells with n < 2 get NaN sd/interval.
+    """
+    hist = np.asarray(hist, dtype=float)
+    v = SCORE_VALUES
+    n = hist.sum(axis=-1)
+    cum = hist.cumsum(axis=-1)
+    nn = n[..., None]
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean = (hist * v).sum(axis=-1) / n
+        var = ((hist * v**2).sum(axis=-1) - n * mean**2) / (n - 1)
+        sd = np.sqrt(np.clip(var, 0, None))
+
+        # Median: middle of the first scores reaching n/2 and passing it
+        lower = v[np.argmax(cum >= nn / 2, axis=-1)]
+        upper = v[np.argmax(cum > nn / 2, axis=-1)]
+        median = (lower + upper) / 2
+
+        # Responses kept per score once `cut` are dropped from each end
+        cut = trim * n
+        kept = np.clip(np.minimum(cum, nn - cut[..., None]) - np.maximum(cum - hist, cut[..., None]), 0, None)
+        t_mean = (kept * v).sum(axis=-1) / kept.sum(axis=-1)
+        # Winsorized: the dropped tails pile onto the lowest and highest kept scores
+        lo = v[np.argmax(cum > cut[..., None], axis=-1)]
+        hi = v[np.argmax(cum >= nn - cut[..., None], axis=-1)]
+        w_mean = ((kept * v).sum(axis=-1) + cut * (lo + hi)) / n
+        w_var = ((kept * v**2).sum(axis=-1) + cut * (lo**2 + hi**2) - n * w_mean**2) / (n - 1)
+        se = np.sqrt(np.clip(w_var, 0, None)) / ((1 - 2 * trim) * np.sqrt(n))
+
+    se = np.where(n < 2, np.nan, se)
+    sd = np.where(n < 2, np.nan, sd)
+    empty = n == 0
+    mean = np.where(empty, np.nan, t_mean)
+    median = np.where(empty, np.nan, median)
+    return {
+        "n": n.astype(int),
+        "mean": mean,
+        "sd": sd,
+        "median": median,
+        "ci_low": mean - Z_95 * se,
+        "ci_high": mean + Z_95 * se,
+    }
+
+@timed
+def compute_faculty_summary(branch, sec, trim=0.0, exclude_flagged=False):
+    """Compute faculty summary, question-wise statistics, and overall ratings for a section.
+
+    Works on the feedback_hist histogram; ``trim``/``exclude_flagged`` apply before the means are taken.
+    """
+    f = section_faculty_df(branch, sec)
 
     qs = get_questions()
     nq = len(qs)
 
-    labels = [f"Q{i}" for i in range(1, nq+1)]
-    def exp(row):
-        arr = [int(x) for x in str(row["q_scores"]).split(",")]
-        while len(arr) < nq:
-            arr.append(None)
-        return pd.Series(arr, index=labels)
-
-    fb_full = pd.concat([fb, fb.apply(exp, axis=1)], axis=1)
+    hist_df = get_section_histogram(branch, sec, nq)
+    if exclude_flagged:
+        hist_df = subtract_flagged(hist_df, get_flagged_histogram(branch, sec, nq), ["n"])
+    if hist_df.empty or f.empty or nq == 0:
+        return f, None, None, None, None
+
+    codes, keys = pd.MultiIndex.from_frame(hist_df[["faculty_name", "subject"]]).factorize()
+    hist = np.zeros((len(keys), nq, len(SCORE_VALUES)))
+    hist[codes, hist_df["question_no"].to_numpy() - 1, hist_df["score"].to_numpy() - 1] = hist_df["n"].to_numpy()
+
+    # Inner join keeps the faculty-list order and drops faculty without feedback
+    order = (
+        f[["faculty_name", "subject", "department"]]
+        .merge(pd.DataFrame({"row": np.arange(len(keys))}, index=keys),
+               left_on=["faculty_name", "subject"], right_index=True, how="inner")
+        .reset_index(drop=True)
+    )
+    if order.empty:
+        return f, None, None, None, None
+    hist = hist[order["row"].to_numpy()]
+
+    cell = histogram_stats(hist, trim)
+    q_means = cell["mean"]
+    overall = q_means.mean(axis=1)
+
+    q_cols = [f"Q{i}_avg" for i in range(1, nq+1)]
+    fac_summary_df = pd.concat([
+        order[["faculty_name", "subject", "department"]].rename(
+            columns={"faculty_name": "Faculty", "subject": "Subject", "department": "Department"}
+        ),
+        # Every submission answers Q1, so the largest per-question count is the response count
+        pd.DataFrame({"Responses": cell["n"].max(axis=1)}),
+        pd.DataFrame(np.round(q_means, 2), columns=q_cols),
+    ], axis=1)
+    fac_summary_df["Overall Avg"] = np.round(overall, 2)
+    fac_summary_df["Overall %"] = np.round(overall / 10 * 100, 1)
+    fac_summary_df["Emoji"] = np.select(
+        [overall >= 8, overall >= 6, overall >= 4], ["😍", "🙂", "😐"], default="😣"
+    )
 
-    summary_rows = []
-    for _, prof in f.iterrows():
-        d = fb_full[
-            (fb_full["faculty_name"] == prof["faculty_name"]) &
-            (fb_full["subject"] == prof["subject"])
-        ]
-        if d.empty:
-            continue
-
-        row = {
-            "Faculty": prof["faculty_name"],
-            "Subject": prof["subject"],
-            "Department": prof["department"],
-            "Responses": len(d),
-        }
-        q_avgs = []
-        for i in range(1, nq+1):
-            col_q = f"Q{i}"
-            avg_i = d[col_q].mean()
-            row[f"Q{i}_avg"] = round(avg_i, 2)
-            q_avgs.append(avg_i)
-        overall = sum(q_avgs) / len(q_avgs) if q_avgs else 0
-        row["Overall Avg"] = round(overall, 2)
-        row["Overall %"] = round((overall / 10) * 100, 1)
-        row["Emoji"] = score_to_emoji(overall)
-        summary_rows.append(row)
-
-    if not summary_rows:
-        return f, fb, None, None, None
-
-    fac_summary_df = pd.DataFrame(summary_rows)
-
-    # Question-wise average
-    qs_rows = []
-    for i, (_, qrow) in enumerate(qs.iterrows(), start=1):
-        col = f"Q{i}_avg"
-        if col in fac_summary_df.columns:
-            qs_rows.append({
-                "Question": qrow["question_text"],
-                "Average Score": fac_summary_df[col].mean()
-            })
-    q_avg_df = pd.DataFrame(qs_rows)
+    # Question-wise statistics over every response in the section, not a mean of faculty means
+    section = histogram_stats(hist.sum(axis=0), trim)
+    q_avg_df = pd.DataFrame({
+        "Question": [q.question_text for q in qs],
+        "Responses": section["n"],
+        "Average Score": np.round(section["mean"], 2),
+        "Std Dev": np.round(section["sd"], 2),
+        "Median": section["median"],
+        "95% CI Low": np.round(section["ci_low"], 2),
+        "95% CI High": np.round(section["ci_high"], 2),
+    })
+
+    # Long table: one row per faculty/subject and question
+    nf = len(order)
+    q_stats_df = pd.DataFrame({
+        "Faculty": np.repeat(order["faculty_name"].to_numpy(), nq),
+        "Subject": np.repeat(order["subject"].to_numpy(), nq),
+        "Question No": np.tile(np.arange(1, nq + 1), nf),
+        "Question": np.tile([q.question_text for q in qs], nf),
+        "Responses": cell["n"].ravel(),
+        "Mean": np.round(cell["mean"].ravel(), 2),
+        "Std Dev": np.round(cell["sd"].ravel(), 2),
+        "Median": cell["median"].ravel(),
+        "95% CI Low": np.round(cell["ci_low"].ravel(), 2),
+        "95% CI High": np.round(cell["ci_high"].ravel(), 2),
+    })
 
     fac_overall_df = fac_summary_df[[
         "Faculty","Subject","Department","Responses","Overall Avg","Overall %","Emoji"
     ]].copy()
 
-    return f, fb, fac_summary_df, q_avg_df, fac_overall_df
+    return f, fac_summary_df, q_avg_df, fac_overall_df, q_stats_df
+
+@timed
+def get_all_aggregates(nq):
+    """Every feedback_agg row (all branches & sections) in one query."""
+    with get_db().connection() as conn:
+        df = pd.read_sql_query("""
+            SELECT branch_code, section, faculty_name, subject, question_no, score_sum, score_count
+            FROM feedback_agg
+            WHERE question_no <= ?
+        """, conn, params=(nq,))
+    return df
 
-def render_feedback_analysis(branch, sec, view_mode):
-    f, fb, fac_summary_df, q_avg_df, fac_overall_df = build_faculty_summary_for_section(branch, sec)
+@timed
+def collapse_whitespace(values):
+    """Strings without outer or repeated whitespace, so "G. Ruth Saleena " and "G. Ruth Saleena" match."""
+    return values.astype(str).str.split().str.join(" ")
+
+def compute_college_summary(exclude_flagged=False):
+    """One row per faculty member, merged across every section and subject they teach.
+
+    Ranked by the mean of their response-weighted question means; None when there is no feedback yet.
+    """
+    nq = len(get_questions())
+    agg = get_all_aggregates(nq)
+    if exclude_flagged:
+        agg = subtract_flagged(agg, get_flagged_aggregates(nq), ["score_sum", "score_count"])
+    if agg.empty or nq == 0:
+        return None
+
+    agg = agg.assign(faculty_key=collapse_whitespace(agg["faculty_name"]))
+    codes, names = pd.factorize(agg["faculty_key"])
+    qi = agg["question_no"].to_numpy() - 1
+    sums = np.zeros((len(names), nq))
+    counts = np.zeros((len(names), nq))
+    np.add.at(sums, (codes, qi), agg["score_sum"].to_numpy())
+    np.add.at(counts, (codes, qi), agg["score_count"].to_numpy())
+    overall = np.divide(sums, counts, out=np.full_like(sums, np.nan), where=counts > 0).mean(axis=1)
+
+    # Response count per teaching assignment (max over questions), then per faculty
+    per_class = agg.groupby(
+        ["faculty_key", "branch_code", "section", "subject"], sort=False
+    )["score_count"].max().reset_index()
+    per_class["subject"] = collapse_whitespace(per_class["subject"])
+    per_class["section_label"] = (per_class["branch_code"] + " " + per_class["section"]).str.strip()
+    per_fac = per_class.groupby("faculty_key", sort=False).agg(
+        Responses=("score_count", "sum"),
+        Sections=("section_label", lambda x: ", ".join(sorted(set(x)))),
+        Subjects=("subject", lambda x: ", ".join(sorted(set(x)))),
+    )
+
+    depts = faculty_df.assign(faculty_key=collapse_whitespace(faculty_df["faculty_name"]))
+    depts = depts.drop_duplicates("faculty_key").set_index("faculty_key")["department"]
+    out = pd.DataFrame({
+        "Faculty": names,
+        "Department": depts.reindex(names).to_numpy(),
+        "Subjects": per_fac["Subjects"].reindex(names).to_numpy(),
+        "Sections": per_fac["Sections"].reindex(names).to_numpy(),
+        "Responses": per_fac["Responses"].reindex(names).to_numpy().astype(int),
+        "Overall Avg": np.round(overall, 2),
+        "Overall %": np.round(overall / 10 * 100, 1),
+    })
+    out["Emoji"] = [score_to_emoji(v) for v in overall]
+    out = out.sort_values(["Overall Avg", "Responses"], ascending=False, ignore_index=True)
+    out.insert(0, "Rank", np.arange(1, len(out) + 1))
+    return out
+
+@timed
+def build_cycle_trend(branch, sec):
+    """Per-faculty overall score in every cycle of a section."""
+    return cached_summary(("trend", branch, norm_section(sec)), compute_cycle_trend, branch, sec)
+
+@timed
+def compute_cycle_trend(branch, sec):
+    """Overall score per faculty/subject and cycle for one section.
+
+    The open cycle comes from feedback_agg, closed ones from their archives; None if none has feedback.
+    """
+    sql = """
+        SELECT faculty_name, subject, question_no, score_sum, score_count
+        FROM {schema}.feedback_agg
+        WHERE branch_code=? AND section=?
+    """
+    params = (branch, norm_section(sec))
+    frames = []
+    with get_db().connection() as conn:
+        for cycle in get_cycles():
+            if cycle.closed_at is None:
+                agg = pd.read_sql_query(sql.format(schema="main"), conn, params=params)
+            elif cycle.archive_file and (ARCHIVE_DIR / cycle.archive_file).exists():
+                with archived_cycle(conn, cycle):
+                    agg = pd.read_sql_query(sql.format(schema="archive"), conn, params=params)
+            else:
+                continue
+            if agg.empty:
+                continue
+            agg["mean"] = agg["score_sum"] / agg["score_count"]
+            per_class = agg.groupby(["faculty_name", "subject"], sort=False).agg(
+                overall=("mean", "mean"), Responses=("score_count", "max"),
+            ).reset_index()
+            per_class["Cycle"] = cycle.name
+            frames.append(per_class)
+    if not frames:
+        return None
+
+    out = pd.concat(frames, ignore_index=True)
+    return pd.DataFrame({
+        "Cycle": out["Cycle"],
+        "Faculty": out["faculty_name"],
+        "Subject": out["subject"],
+        "Faculty / Subject": out["faculty_name"].str.strip() + " (" + out["subject"].str.strip() + ")",
+        "Responses": out["Responses"].astype(int),
+        "Overall Avg": out["overall"].round(2),
+        "Overall %": (out["overall"] / 10 * 100).round(1),
+    })
+
+@timed
+def cycle_trend_figure(trend, order):
+    fig = px.line(
+        trend, x="Cycle", y="Overall %", color="Faculty / Subject", markers=True,
+        category_orders={"Cycle": list(order)},
+    )
+    fig.update_layout(yaxis_range=[0, 100])
+    return fig
+
+def render_cycle_trend(branch, sec):
+    st.write("### Cross-term Trend")
+    trend = build_cycle_trend(branch, sec)
+    if trend is None:
+        st.info("No feedback recorded for this branch/section in any cycle.")
+        return
+
+    order = [c.name for c in get_cycles() if c.name in set(trend["Cycle"])]
+    with timed_span("figure.cycle_trend"):
+        fig = cached_summary(
+            ("figure", "cycle_trend", branch, norm_section(sec)), cycle_trend_figure, trend, tuple(order)
+        )
+    with timed_span("st.plotly_chart"):
+        st.plotly_chart(fig, use_container_width=True)
+
+    table = trend.pivot_table(index="Faculty / Subject", columns="Cycle", values="Overall %")
+    st.dataframe(table.reindex(columns=order))
+    render_export_buttons(trend.drop(columns=["Faculty / Subject"]), "cross_term_trend")
+
+@timed
+def render_college_summary(exclude_flagged=False):
+    college_df = build_college_summary(exclude_flagged)
+    if college_df is None:
+        st.info("No feedback submitted yet.")
+        return
+
+    st.write("### Faculty Ranking Across All Sections")
+    st.dataframe(college_df, hide_index=True)
+    render_export_buttons(college_df, "college_faculty_ranking")
+
+def rating_bar_figure(fac_overall_df):
+    chart_df = fac_overall_df.sort_values("Overall Avg", ascending=True)
+    fig = px.bar(
+        chart_df.assign(Label=chart_df["Faculty"] + " " + chart_df["Emoji"]),
+        x="Overall Avg",
+        y="Label",
+        orientation="h",
+        text="Overall Avg",
+    )
+    fig.update_layout(
+        xaxis_title="Average Rating (1–10)",
+        yaxis_title="Faculty",
+        margin=dict(l=10,r=10,t=30,b=10),
+    )
+    return fig
+
+def percentage_pie_figure(fac_overall_df, hole=0.3):
+    fig = px.pie(
+        fac_overall_df,
+        names="Faculty",
+        values="Overall %",
+        hover_data=["Subject","Department","Emoji"],
+        hole=hole,
+    )
+    fig.update_traces(textinfo="percent+label")
+    return fig
+
+SECTION_FIGURES = {
+    "rating_bar": rating_bar_figure,
+    "percentage_pie": percentage_pie_figure,
+    "principal_pie": lambda df: percentage_pie_figure(df, hole=0.35),
+}
+
+def section_figure(kind, branch, sec, options, fac_overall_df):
+    """Plotly figure for a section chart, built once per data version.
+
+    Keyed like the section summary it is drawn from, ``options`` being its trim/exclude settings.
+    """
+    return cached_summary(
+        ("figure", kind, branch, norm_section(sec), *options), SECTION_FIGURES[kind], fac_overall_df
+    )
+
+def trim_option(key):
+    """Checkbox for trimmed means; returns the fraction to trim (0 when off)."""
+    on = st.checkbox(
+        f"Trimmed means (ignore the top & bottom {TRIM_FRACTION:.0%} of responses)",
+        key=key,
+        help="Damps students who gave every question 1 or 10.",
+    )
+    return TRIM_FRACTION if on else 0.0
+
+def exclude_flagged_option(key):
+    """Checkbox to leave out submissions the anomaly scan flagged."""
+    return st.checkbox(
+        "Exclude flagged submissions",
+        key=key,
+        help="Straight-lined (same score everywhere), rushed, or far off the other ratings. "
+             "New submissions are scanned when this is switched on.",
+    )
+
+@timed
+def render_feedback_analysis(branch, sec, view_mode, trim=0.0, exclude_flagged=False):
+    if view_mode == "Cross-term trend":
+        render_cycle_trend(branch, sec)
+        return
+    if view_mode == "Submission trend (daily/weekly)":
+        render_submission_trend(branch, sec)
+        return
+    if view_mode == "Participation":
+        render_participation(branch, sec)
+        return
+
+    options = (trim, exclude_flagged)
+    f, fac_summary_df, q_avg_df, fac_overall_df, q_stats_df = build_faculty_summary_for_section(
+        branch, sec, *options
+    )
 
     st.write("### Faculty in this Branch & Section")
     st.dataframe(f[["sno", "faculty_name", "subject", "department"]])
 
-    if fb.empty or fac_summary_df is None:
+    if fac_summary_df is None:
         st.info("No feedback submitted yet for this branch/section.")
         return
 
     # ------- VIEW SWITCHING -------
     if view_mode == "Faculty summary":
         st.write("### Faculty-wise Summary 😍🙂😐😣")
-        st.dataframe(fac_summary_df)
+        with timed_span("st.dataframe"):
+            st.dataframe(fac_summary_df)
         render_export_buttons(fac_summary_df, "faculty_summary")
 
     elif view_mode == "Question-wise average (table)":
@@ -575,24 +2303,20 @@ def render_feedback_analysis(branch, sec, view_mode):
         st.dataframe(q_avg_df)
         render_export_buttons(q_avg_df, "question_wise_average")
 
+    elif view_mode == "Question statistics (per faculty)":
+        st.write("### Question Statistics per Faculty")
+        st.caption("Mean, spread, median and 95% confidence interval of each question's scores.")
+        with timed_span("st.dataframe"):
+            st.dataframe(q_stats_df, hide_index=True)
+        render_export_buttons(q_stats_df, "question_statistics")
+
     elif view_mode == "Overall faculty rating (horizontal bar)":
         st.write("### Overall Faculty Rating (Horizontal Bar)")
         if not fac_overall_df.empty:
-            chart_df = fac_overall_df.sort_values("Overall Avg", ascending=True)
-            chart_df["Label"] = chart_df["Faculty"] + " " + chart_df["Emoji"]
-            fig = px.bar(
-                chart_df,
-                x="Overall Avg",
-                y="Label",
-                orientation="h",
-                text="Overall Avg",
-            )
-            fig.update_layout(
-                xaxis_title="Average Rating (1–10)",
-                yaxis_title="Faculty",
-                margin=dict(l=10,r=10,t=30,b=10),
-            )
-            st.plotly_chart(fig, use_container_width=True)
+            with timed_span("figure.rating_bar"):
+                fig = section_figure("rating_bar", branch, sec, options, fac_overall_df)
+            with timed_span("st.plotly_chart"):
+                st.plotly_chart(fig, use_container_width=True)
             render_export_buttons(fac_overall_df, "overall_faculty_rating")
         else:
             st.info("No faculty overall data available to plot.")
@@ -600,15 +2324,10 @@ def render_feedback_analysis(branch, sec, view_mode):
     elif view_mode == "Overall faculty percentage (pie chart)":
         st.write("### Overall Faculty Feedback Percentage (Pie)")
         if not fac_overall_df.empty:
-            fig = px.pie(
-                fac_overall_df,
-                names="Faculty",
-                values="Overall %", 
-                hover_data=["Subject","Department","Emoji"],
-                hole=0.3,
-            )
-            fig.update_traces(textinfo="percent+label")
-            st.plotly_chart(fig, use_container_width=True)
+            with timed_span("figure.percentage_pie"):
+                fig = section_figure("percentage_pie", branch, sec, options, fac_overall_df)
+            with timed_span("st.plotly_chart"):
+                st.plotly_chart(fig, use_container_width=True)
             render_export_buttons(fac_overall_df[["Faculty","Overall %","Subject","Department","Emoji"]],
                                   "overall_faculty_percentage")
         else:
@@ -631,11 +2350,198 @@ def render_feedback_analysis(branch, sec, view_mode):
 
     elif view_mode == "Raw feedback records":
         st.write("### Raw Feedback Entries (Student Info Hidden)")
-        fb_copy = fb.copy()
-        if "student_regd_no" in fb_copy.columns:
-            fb_copy = fb_copy.drop(columns=["student_regd_no"])
-        st.dataframe(fb_copy)
-        render_export_buttons(fb_copy, "raw_feedback")
+        render_raw_feedback_viewer("raw_feedback", branch, sec)
+
+TREND_PERIODS = {"Daily": "day", "Weekly": "week"}
+
+@timed
+def compute_submission_trend(branch, sec, period):
+    """Submissions and overall score per faculty/subject and day or week of a section.
+
+    Reads only the feedback_trend rollup; None if the section has no feedback yet.
+    """
+    with get_db().connection() as conn:
+        df = pd.read_sql_query("""
+            SELECT bucket, faculty_name, subject, submissions, score_sum, score_count
+            FROM feedback_trend
+            WHERE branch_code=? AND section=? AND period=?
+            ORDER BY bucket
+        """, conn, params=(branch, norm_section(sec), period))
+    if df.empty:
+        return None
+
+    overall = df["score_sum"] / df["score_count"].where(df["score_count"] > 0)
+    return pd.DataFrame({
+        "Period Start": pd.to_datetime(df["bucket"]),
+        "Faculty": df["faculty_name"],
+        "Subject": df["subject"],
+        "Faculty / Subject": df["faculty_name"].str.strip() + " (" + df["subject"].str.strip() + ")",
+        "Submissions": df["submissions"],
+        "Overall Avg": overall.round(2),
+        "Overall %": (overall / 10 * 100).round(1),
+    })
+
+@timed
+def submission_trend_figures(trend):
+    totals = trend.groupby("Period Start", as_index=False)["Submissions"].sum()
+    submissions_fig = px.bar(totals, x="Period Start", y="Submissions")
+    scores_fig = px.line(trend, x="Period Start", y="Overall %", color="Faculty / Subject", markers=True)
+    scores_fig.update_layout(yaxis_range=[0, 100])
+    return submissions_fig, scores_fig
+
+def render_submission_trend(branch, sec):
+    st.write("### Submission Trend")
+    label = st.radio("Group by", list(TREND_PERIODS), horizontal=True, key="trend_period")
+    period = TREND_PERIODS[label]
+    scope = (branch, norm_section(sec), period)
+    trend = cached_summary(("submission_trend",) + scope, compute_submission_trend, branch, sec, period)
+    if trend is None:
+        st.info("No feedback submitted yet for this branch/section.")
+        return
+
+    with timed_span("figure.submission_trend"):
+        submissions_fig, scores_fig = cached_summary(
+            ("figure", "submission_trend") + scope, submission_trend_figures, trend
+        )
+    st.write(f"#### {label} Submissions")
+    with timed_span("st.plotly_chart"):
+        st.plotly_chart(submissions_fig, use_container_width=True)
+    st.write(f"#### {label} Overall % per Faculty")
+    with timed_span("st.plotly_chart"):
+        st.plotly_chart(scores_fig, use_container_width=True)
+    render_export_buttons(trend, f"submission_trend_{period}")
+
+PARTICIPATION_STATUSES = ["Not started", "Partial", "Complete"]
+
+@timed
+def compute_participation(branch, sec):
+    """Every roster student of a section with how many of its faculty/subjects they have rated.
+
+    Reads the student_progress rollup, not feedback; returns (faculty/subjects per student, DataFrame).
+    """
+    sec = norm_section(sec)
+    expected = len(faculty_for_section(branch, sec))
+    roster = students_df.loc[
+        (students_df["branch_code"].astype(str) == branch) & (students_df["section"].astype(str) == sec),
+        ["regd_no", "name"],
+    ].astype(str)
+    with get_db().connection() as conn:
+        progress = pd.read_sql_query("""
+            SELECT student_regd_no AS regd_no, submitted, last_submitted_at
+            FROM student_progress
+            WHERE branch_code=? AND section=?
+        """, conn, params=(branch, sec))
+
+    df = roster.merge(progress, on="regd_no", how="left")
+    submitted = df["submitted"].fillna(0).astype(int).clip(upper=expected)
+    out = pd.DataFrame({
+        "Regd. No.": df["regd_no"],
+        "Name": df["name"],
+        "Submitted": submitted,
+        "Pending": expected - submitted,
+        "Status": np.select([submitted >= expected, submitted > 0], ["Complete", "Partial"], "Not started"),
+        "Last Submission": df["last_submitted_at"].str.slice(0, 16).str.replace("T", " "),
+    })
+    return expected, out.sort_values(["Submitted", "Regd. No."], ignore_index=True)
+
+def render_participation(branch, sec):
+    st.write("### Participation")
+    expected, df = cached_summary(
+        ("participation", branch, norm_section(sec)), compute_participation, branch, sec
+    )
+    if df.empty or expected == 0:
+        st.info("No students or faculty listed for this branch/section.")
+        return
+
+    status = df["Status"].value_counts()
+    cols = st.columns(4)
+    cols[0].metric("Students", len(df))
+    cols[1].metric("Completed", int(status.get("Complete", 0)))
+    cols[2].metric("Not started", int(status.get("Not started", 0)))
+    cols[3].metric("Participation", f"{df['Submitted'].sum() / (len(df) * expected):.0%}")
+    st.caption(f"{expected} faculty/subjects to rate per student in the open cycle.")
+
+    show = st.multiselect("Show", PARTICIPATION_STATUSES, default=PARTICIPATION_STATUSES[:2])
+    shown = df[df["Status"].isin(show)]
+    with timed_span("st.dataframe"):
+        st.dataframe(shown, hide_index=True)
+    render_export_buttons(shown, "participation")
+
+RAW_PAGE_SIZES = [25, 50, 100, 200]
+
+@timed
+def render_raw_feedback_viewer(key, branch=None, sec=None):
+    """Filtered, paged raw feedback; only the visible page is fetched.
+
+    With ``branch`` the section is fixed (HOD/Principal); otherwise it is a filter too (admin).
+    """
+    fixed_scope = branch is not None
+    fac = faculty_df
+    cols = st.columns(4)
+    if not fixed_scope:
+        with cols[0]:
+            b = st.selectbox("Branch", ["All"] + list(faculty.sections), key=f"{key}_branch")
+            branch = None if b == "All" else b
+        with cols[1]:
+            secs = [x for x in faculty.sections.get(branch, ()) if x] if branch else []
+            s = st.selectbox("Section", ["All"] + secs, key=f"{key}_section") if secs else "All"
+            sec = None if s == "All" else s
+        if branch is not None:
+            fac = fac[fac["branch_code"] == branch]
+            if sec is not None:
+                fac = fac[fac["section"] == sec]
+    else:
+        fac = section_faculty_df(branch, sec)
+        # Fixed scope still filters on section ('' when the branch has none)
+        sec = norm_section(sec)
+    with cols[2]:
+        f = st.selectbox("Faculty", ["All"] + sorted(fac["faculty_name"].unique()), key=f"{key}_faculty")
+        faculty_name = None if f == "All" else f
+    with cols[3]:
+        subjects = fac[fac["faculty_name"] == faculty_name]["subject"] if faculty_name else fac["subject"]
+        sb = st.selectbox("Subject", ["All"] + sorted(subjects.unique()), key=f"{key}_subject")
+        subject = None if sb == "All" else sb
+
+    col1, col2 = st.columns([3, 1])
+    with col1:
+        dates = st.date_input("Submitted between", value=(), key=f"{key}_dates")
+    with col2:
+        page_size = st.selectbox("Rows per page", RAW_PAGE_SIZES, index=1, key=f"{key}_page_size")
+    date_from = dates[0] if len(dates) > 0 else None
+    date_to = dates[1] if len(dates) > 1 else date_from
+
+    where, params = feedback_filter(branch, sec, faculty_name, subject, date_from, date_to)
+    total = count_feedback(where, params)
+
+    # Keyset pagination: a stack of the last id before each visited page,
+    # reset whenever the filters change
+    state_key = f"{key}_pages"
+    signature = (where, params, page_size)
+    if st.session_state.get(f"{key}_signature") != signature:
+        st.session_state[f"{key}_signature"] = signature
+        st.session_state[state_key] = [0]
+    pages = st.session_state[state_key]
+
+    page = get_feedback_page(where, params, pages[-1], page_size)
+    n_pages = max(1, -(-total // page_size))
+    prev_col, info_col, next_col = st.columns([1, 3, 1])
+    with prev_col:
+        if st.button("◀ Previous", key=f"{key}_prev", disabled=len(pages) == 1):
+            pages.pop()
+            st.rerun()
+    with next_col:
+        has_next = len(page) == page_size and (len(pages) * page_size) < total
+        if st.button("Next ▶", key=f"{key}_next", disabled=not has_next):
+            pages.append(int(page["id"].iloc[-1]))
+            st.rerun()
+    with info_col:
+        st.caption(f"Page {len(pages)} of {n_pages} · {total} matching entries")
+
+    st.dataframe(page, hide_index=True)
+    render_export_buttons(
+        (f"SELECT {RAW_FEEDBACK_COLUMNS} FROM feedback WHERE {where} ORDER BY id", params),
+        key,
+    )
 
 # -----------------------------
 # HOD PANEL
@@ -643,78 +2549,77 @@ def render_feedback_analysis(branch, sec, view_mode):
 def hod_panel():
     st.markdown("### HOD Dashboard")
     branch, sec = section_selector()
+    exclude_flagged = exclude_flagged_option("hod_exclude_flagged")
+
+    if branch == ALL_SECTIONS:
+        render_college_summary(exclude_flagged)
+        return
 
     view_mode = st.selectbox(
         "Select Feedback View",
         [
             "Faculty summary",
             "Question-wise average (table)",
+            "Question statistics (per faculty)",
             "Overall faculty rating (horizontal bar)",
             "Overall faculty percentage (pie chart)",
             "Top & Bottom 3 Faculty",
             "Raw feedback records",
+            "Submission trend (daily/weekly)",
+            "Participation",
+            "Cross-term trend",
         ]
     )
 
-    render_feedback_analysis(branch, sec, view_mode)
+    trim = trim_option("hod_trim")
+
+    render_feedback_analysis(branch, sec, view_mode, trim, exclude_flagged)
 
 # -----------------------------
 # PRINCIPAL PANEL
 # -----------------------------
+@timed
 def principal_panel():
     st.markdown("### Principal Dashboard")
     branch, sec = section_selector()
+    exclude_flagged = exclude_flagged_option("principal_exclude_flagged")
 
-    f, fb, fac_summary_df, q_avg_df, fac_overall_df = build_faculty_summary_for_section(branch, sec)
+    if branch == ALL_SECTIONS:
+        render_college_summary(exclude_flagged)
+        return
+
+    options = (trim_option("principal_trim"), exclude_flagged)
+    f, fac_summary_df, q_avg_df, fac_overall_df, q_stats_df = build_faculty_summary_for_section(
+        branch, sec, *options
+    )
 
     st.write("### Faculty in this Branch & Section")
     st.dataframe(f[["sno","faculty_name","subject","department"]])
 
-    if fb.empty or fac_overall_df is None:
+    # Archives are only attached when asked for
+    if st.checkbox("Show cross-term trend"):
+        render_cycle_trend(branch, sec)
+
+    if fac_overall_df is None:
         st.info("No feedback submitted yet for this branch/section.")
         return
 
     # 1) Overall faculty percentage (pie)
     st.write("### Overall Faculty Feedback Percentage (Pie)")
-    fig_pie = px.pie(
-        fac_overall_df,
-        names="Faculty",
-        values="Overall %",
-        hover_data=["Subject","Department","Emoji"],
-        hole=0.35,
-    )
-    fig_pie.update_traces(textinfo="percent+label")
-    st.plotly_chart(fig_pie, use_container_width=True)
+    with timed_span("figure.principal_pie"):
+        fig_pie = section_figure("principal_pie", branch, sec, options, fac_overall_df)
+    with timed_span("st.plotly_chart"):
+        st.plotly_chart(fig_pie, use_container_width=True)
 
     # 2) Overall faculty ratings table (unique view with Plotly Table)
     st.write("### Overall Faculty Ratings Table (with Emojis)")
 
-    fig_table = go.Figure(
-        data=[
-            go.Table(
-                header=dict(
-                    values=["Faculty", "Subject", "Department", "Responses", "Overall Avg", "Overall %", "Mood"],
-                    fill_color="#f0e6dd",
-                    align="left"
-                ),
-                cells=dict(
-                    values=[
-                        fac_overall_df["Faculty"],
-                        fac_overall_df["Subject"],
-                        fac_overall_df["Department"],
-                        fac_overall_df["Responses"],
-                        fac_overall_df["Overall Avg"],
-                        fac_overall_df["Overall %"],
-                        fac_overall_df["Emoji"],
-                    ],
-                    fill_color="#ffffff",
-                    align="left"
-                ),
-            )
-        ]
-    )
-    fig_table.update_layout(margin=dict(l=10,r=10,t=30,b=10))
-    st.plotly_chart(fig_table, use_container_width=True)
+    with timed_span("st.dataframe"):
+        st.dataframe(
+            fac_overall_df.rename(columns={"Emoji": "Mood"}),
+            hide_index=True,
+            use_container_width=True,
+        )
 
     # Export buttons for principal’s combined overall table
     render_export_buttons(fac_overall_df, "principal_overall_faculty")
@@ -722,9 +2627,26 @@ def principal_panel():
 # -----------------------------
 # ADMIN PANEL
 # -----------------------------
+def save_roster_upload(upload, cache, name):
+    """Write an uploaded roster once it parses; the filename decides its branch & section."""
+    prefix = cache.prefix
+    name = Path(name.strip()).name
+    if not name.upper().startswith(f"{prefix}_") or parse_roster_filename(name) is None:
+        st.error(f"Filename must look like {prefix}_<YEAR-BRANCH>.csv or {prefix}_<YEAR-BRANCH>_<SECTION>.csv")
+        return
+    branch, sec = parse_roster_filename(name)
+    try:
+        cache.read_file(BytesIO(upload.getvalue()), branch, sec)
+    except (ValueError, KeyError) as e:
+        st.error(f"Not saved, {name} can't be read as a roster: {e}")
+        return
+    with open(cache.directory / name, "wb") as f:
+        f.write(upload.getbuffer())
+    st.success(f"Saved. Live now for {branch}" + (f" section {sec}." if sec else "."))
+
 def admin_panel():
     st.markdown("### Admin Panel")
-    tabs = st.tabs(["Uploads", "Edit Questions", "Reset"])
+    tabs = st.tabs(["Uploads", "Edit Questions", "Reset", "Cycles", "Flags", "Performance"])
 
     # UPLOADS
     with tabs[0]:
@@ -733,9 +2655,7 @@ def admin_panel():
         name1 = st.text_input("Save as filename (e.g. S_IV-CSE_A.csv)")
         if st.button("Save Students CSV"):
             if f1 and name1:
-                with open(STUDENTS_DIR / name1, "wb") as f:
-                    f.write(f1.getbuffer())
-                st.success("Saved.")
+                save_roster_upload(f1, student_roster_cache(), name1)
             else:
                 st.error("Select file & enter name.")
 
@@ -744,9 +2664,7 @@ def admin_panel():
         name2 = st.text_input("Save as filename (e.g. F_IV-CSE_A.csv)")
         if st.button("Save Faculty CSV"):
             if f2 and name2:
-                with open(FACULTY_DIR / name2, "wb") as f:
-                    f.write(f2.getbuffer())
-                st.success("Saved.")
+                save_roster_upload(f2, faculty_roster_cache(), name2)
             else:
                 st.error("Select file & enter name.")
 
@@ -754,38 +2672,179 @@ def admin_panel():
     with tabs[1]:
         st.write("#### Edit Feedback Questions")
         qs = get_questions()
-        t = "\n".join(qs["question_text"])
+        t = "\n".join(q.question_text for q in qs)
         new = st.text_area("One question per line", value=t, height=300)
         if st.button("Save Questions"):
             arr = [x.strip() for x in new.split("\n") if x.strip()]
-            conn = get_connection()
-            c = conn.cursor()
-            c.execute("DELETE FROM feedback_questions")
-            for i, q in enumerate(arr, 1):
-                c.execute("INSERT INTO feedback_questions(question_text, order_no) VALUES(?,?)", (q, i))
-            conn.commit()
-            conn.close()
+            with get_db().transaction() as conn:
+                c = conn.cursor()
+                c.execute("DELETE FROM feedback_questions")
+                for i, q in enumerate(arr, 1):
+                    c.execute("INSERT INTO feedback_questions(question_text, order_no) VALUES(?,?)", (q, i))
+                rebuild_feedback_agg(c)
+                bump_data_version(c, "questions_version")
             st.success("Updated!")
 
     # RESET
     with tabs[2]:
         st.write("#### Raw Feedback")
-        conn = get_connection()
-        df = pd.read_sql("SELECT * FROM feedback", conn)
-        conn.close()
-        if "student_regd_no" in df.columns:
-            df = df.drop(columns=["student_regd_no"])
-        st.dataframe(df)
+        render_raw_feedback_viewer("admin_raw_feedback")
 
-        render_export_buttons(df, "admin_raw_feedback")
+        if st.button("Rebuild summary aggregates"):
+            with get_db().transaction() as conn:
+                rebuild_feedback_agg(conn.cursor())
+                rebuild_feedback_rollups(conn.cursor())
+            st.success("Aggregates rebuilt.")
 
         if st.button("RESET ALL FEEDBACK"):
-            conn = get_connection()
-            conn.execute("DELETE FROM feedback")
-            conn.commit()
-            conn.close()
+            with get_db().transaction() as conn:
+                conn.execute("DELETE FROM feedback_agg")
+                conn.execute("DELETE FROM feedback_hist")
+                conn.execute("DELETE FROM feedback_flags")
+                conn.execute("DELETE FROM feedback_trend")
+                conn.execute("DELETE FROM student_progress")
+                conn.execute("DELETE FROM feedback_scores")
+                conn.execute("DELETE FROM feedback")
+                bump_data_version(conn.cursor(), "feedback_version")
             st.warning("All feedback cleared!")
 
+        with st.expander("Database connection stats"):
+            st.json(get_db().stats())
+
+    # CYCLES
+    with tabs[3]:
+        st.write("#### Feedback Cycles")
+        cycles = pd.DataFrame(get_cycles(), columns=Cycle._fields)
+        st.dataframe(cycles.drop(columns=["id"]), hide_index=True)
+
+        current = get_open_cycle()
+        if current is not None:
+            st.write(f"Open cycle: **{current.name}**")
+            st.caption("Closing moves its feedback into an archive file and empties the live tables.")
+            confirm = st.checkbox(f"I want to close {current.name}")
+            if st.button("Close & archive cycle", disabled=not confirm):
+                close_cycle()
+                st.rerun()
+        else:
+            name = st.text_input("New cycle name (e.g. 2025-26 Sem 1)")
+            if st.button("Open cycle"):
+                if not name.strip():
+                    st.error("Enter a cycle name.")
+                else:
+                    try:
+                        open_cycle(name.strip())
+                    except sqlite3.IntegrityError:
+                        st.error("A cycle with that name already exists.")
+                    else:
+                        st.rerun()
+
+    # FLAGS
+    with tabs[4]:
+        render_flags_panel()
+
+    # PERFORMANCE
+    with tabs[5]:
+        render_performance_panel()
+
+FLAGGED_FEEDBACK_SQL = """
+    SELECT f.id, f.branch_code, f.section, f.faculty_name, f.subject, f.q_scores,
+           f.duration_s, f.created_at,
+           GROUP_CONCAT(ff.reason, ', ') AS reasons, GROUP_CONCAT(ff.detail, '; ') AS details
+    FROM feedback_flags ff
+    JOIN feedback f ON f.id = ff.feedback_id
+    GROUP BY f.id
+    ORDER BY f.id DESC
+"""
+
+@timed
+def render_flags_panel():
+    st.write("#### Flagged Submissions")
+    st.caption(
+        f"Straight-lined: same score for every question. Rushed: under {MIN_SECONDS_PER_QUESTION:g}s "
+        f"per question. Outlier: far from the faculty's other ratings (needs "
+        f"{OUTLIER_MIN_RESPONSES} responses). Only submissions since the last scan are checked."
+    )
+
+    col1, col2 = st.columns(2)
+    with col1:
+        if st.button("Scan new submissions"):
+            scanned, flagged = scan_feedback_flags()
+            st.success(f"Scanned {scanned} submissions, {flagged} flagged.")
+    with col2:
+        if st.button("Rescan all submissions"):
+            reset_feedback_flags()
+            scanned, flagged = scan_feedback_flags()
+            st.success(f"Rescanned {scanned} submissions, {flagged} flagged.")
+
+    with get_db().connection() as conn:
+        checkpoint = get_flags_checkpoint(conn)
+        (total,) = conn.execute("SELECT COUNT(*) FROM feedback").fetchone()
+        (pending,) = conn.execute("SELECT COUNT(*) FROM feedback WHERE id > ?", (checkpoint,)).fetchone()
+        by_reason = pd.read_sql_query(
+            "SELECT reason, COUNT(*) AS submissions FROM feedback_flags GROUP BY reason", conn
+        )
+        recent = pd.read_sql_query(FLAGGED_FEEDBACK_SQL + " LIMIT 200", conn)
+
+    st.write(f"{total} submissions in this cycle, {pending} not scanned yet.")
+    if by_reason.empty:
+        st.info("No flagged submissions.")
+        return
+    by_reason["reason"] = by_reason["reason"].map(FLAG_REASONS).fillna(by_reason["reason"])
+    st.dataframe(by_reason.rename(columns={"reason": "Reason", "submissions": "Submissions"}), hide_index=True)
+
+    st.write("#### Most recent (up to 200)")
+    st.dataframe(recent, hide_index=True)
+    render_export_buttons((FLAGGED_FEEDBACK_SQL, ()), "flagged_feedback")
+
+def span_stats(spans):
+    """p50/p95/max per span name, slowest total time first."""
+    df = pd.DataFrame(spans, columns=Span._fields)
+    out = df.groupby("name")["duration_ms"].agg(
+        Calls="count",
+        p50=lambda x: x.quantile(0.5),
+        p95=lambda x: x.quantile(0.95),
+        Max="max",
+        Total="sum",
+    )
+    out = out.rename(columns={"p50": "p50 ms", "p95": "p95 ms", "Max": "Max ms", "Total": "Total ms"})
+    return out.sort_values("Total ms", ascending=False).round(2).reset_index().rename(columns={"name": "Span"})
+
+def render_performance_panel():
+    st.write("#### Timing (this server process)")
+    spans = span_recorder().snapshot()
+    if not spans:
+        st.info("No timings recorded yet.")
+        return
+
+    st.caption(f"{len(spans)} most recent spans; durations in milliseconds.")
+    st.dataframe(span_stats(spans), hide_index=True)
+
+    st.write("#### Slowest recent reruns")
+    reruns = pd.DataFrame([x for x in spans if x.name == "rerun"], columns=Span._fields)
+    if not reruns.empty:
+        reruns = reruns.nlargest(10, "duration_ms")
+        reruns["started_at"] = pd.to_datetime(reruns["started_at"], unit="s").dt.strftime("%Y-%m-%d %H:%M:%S")
+        st.dataframe(
+            reruns[["started_at", "label", "duration_ms"]].round(1).rename(
+                columns={"started_at": "Started (UTC)", "label": "Role", "duration_ms": "Duration ms"}
+            ),
+            hide_index=True,
+        )
+
+    col1, col2 = st.columns(2)
+    with col1:
+        if st.button("⬇️ Export timings (JSON)"):
+            st.download_button(
+                label="Download JSON",
+                data=json.dumps([x._asdict() for x in spans]).encode("utf-8"),
+                file_name="timings.json",
+                mime="application/json",
+            )
+    with col2:
+        if st.button("Clear timings"):
+            span_recorder().clear()
+            st.rerun()
+
 # -----------------------------
 # LOGIN SCREEN
 # -----------------------------
@@ -818,7 +2877,11 @@ def login_screen():
 # MAIN
 # -----------------------------
 def main():
-    init_db()
+    with timed_span("rerun", label=st.session_state.get("auth_role") or "Login"):
+        render_app()
+
+def render_app():
+    get_db()
 
     if "auth_role" not in st.session_state:
         st.session_state["auth_role"] = None
@@ -832,6 +2895,9 @@ def main():
     if st.button("Logout"):
         st.session_state["auth_role"] = None
         st.session_state.pop("student_info", None)
+        # Form timers and multi-form answers belong to the student who just left
+        for key in [k for k in st.session_state if k.startswith(("mf_", "form_started_at_"))]:
+            del st.session_state[key]
         st.rerun()
 
     role = st.session_state["auth_role"]
@@ -0,0 +1,259 @@
+# ============================================================
+#              SJCET FEEDBACK SYSTEM - LOAD TEST
+# ============================================================
+"""Simulate many students submitting feedback at once, without a browser.
+
+    python benchmark.py [--threads 16] [--processes 1] [--students 600] [--json out.json]
+
+Synthetic student/faculty rosters are written in the same CSV layout as
+students_list/ and faculty_list/ to a temporary directory, together with a
+fresh feedback.db, so the real data is never touched. Each simulated
+student logs in (authenticate_student), then for every faculty/subject of
+their section checks feedback_exists and calls save_feedback. Every
+--summary-every students one of them also opens the section summary
+(build_faculty_summary_for_section), as an HOD would.
+
+Reports p50/p95/p99 latency per operation, student and submission
+throughput, errors (by exception type and message) and SQLite lock errors/waits.
+"""
+
+import argparse
+import csv
+import json
+import os
+import queue
+import random
+import shutil
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, timedelta
+from pathlib import Path
+
+import numpy as np
+
+OPERATIONS = ("authenticate_student", "feedback_exists", "save_feedback", "build_faculty_summary_for_section")
+STUDENT_COLUMNS = ["Regd. No.", "Name", "Father Name", "Year & Br.", "Parent Ph.-1", "Student Ph.1", "DOB", "email ID"]
+FACULTY_COLUMNS = ["S.No", "Faculty Name", "Subject (Full Form)", "Department"]
+DEPARTMENTS = ["CSE", "ECE", "H&S", "EEE"]
+
+
+def write_rosters(workdir, branches, sections, students_per_section, faculty_per_section, seed):
+    """Write S_/F_ roster CSVs; returns [(regd_no, dob, branch, section)] for the simulation."""
+    rng = random.Random(seed)
+    students_dir = workdir / "students_list"
+    faculty_dir = workdir / "faculty_list"
+    students_dir.mkdir()
+    faculty_dir.mkdir()
+
+    logins = []
+    for b in range(branches):
+        branch = f"IV-B{b + 1}"
+        for sec in [chr(ord("A") + i) for i in range(sections)] or [None]:
+            suffix = f"_{sec}" if sec else ""
+            with open(students_dir / f"S_{branch}{suffix}.csv", "w", newline="") as f:
+                w = csv.writer(f)
+                w.writerow(STUDENT_COLUMNS)
+                for n in range(students_per_section):
+                    reg = f"B{b + 1}{sec or 'X'}{n:05d}"
+                    dob = date(2005, 1, 1) + timedelta(days=rng.randrange(730))
+                    dob_text = dob.strftime("%m/%d/%Y")
+                    w.writerow([reg, f"STUDENT {reg}", "PARENT", branch, "9000000000", "-", dob_text, ""])
+                    logins.append((reg, dob.strftime("%d/%m/%Y"), branch, sec))
+            with open(faculty_dir / f"F_{branch}{suffix}.csv", "w", newline="", encoding="latin1") as f:
+                w = csv.writer(f)
+                w.writerow(FACULTY_COLUMNS)
+                lab_of = None
+                for n in range(faculty_per_section):
+                    # Every third row is the lab of the previous teacher's subject
+                    if n % 3 == 2 and lab_of:
+                        fac, subject = lab_of[0], f"{lab_of[1]} Lab"
+                    else:
+                        fac, subject = f"Faculty {b + 1}.{n + 1}", f"Subject {n + 1}"
+                        lab_of = (fac, subject)
+                    w.writerow([n + 1, fac, subject, rng.choice(DEPARTMENTS)])
+    rng.shuffle(logins)
+    return logins
+
+
+def run_workers(logins, threads, summary_every, deadline):
+    """Drive the data layer from `threads` threads in this process; returns raw results."""
+    import app  # after the SJCET_* environment points at the synthetic data
+
+    app.get_db()
+    work = queue.Queue()
+    for i, login in enumerate(logins):
+        work.put((i, login))
+
+    latencies = {op: [] for op in OPERATIONS}
+    counts = {"students": 0, "submissions": 0, "duplicates": 0, "auth_failures": 0, "errors": 0, "lock_errors": 0}
+    # "ExceptionType: message" -> how often it was raised
+    errors = Counter()
+    lock = threading.Lock()
+
+    def timed(op, fn, *args):
+        start = time.perf_counter()
+        result = fn(*args)
+        elapsed = time.perf_counter() - start
+        with lock:
+            latencies[op].append(elapsed)
+        return result
+
+    def worker():
+        while time.monotonic() < deadline:
+            try:
+                i, (reg, dob, branch, sec) = work.get_nowait()
+            except queue.Empty:
+                return
+            try:
+                if timed("authenticate_student", app.authenticate_student, reg, dob, branch, sec) is None:
+                    with lock:
+                        counts["auth_failures"] += 1
+                    continue
+                submitted = duplicates = 0
+                for rec in app.faculty_for_section(branch, sec):
+                    if timed("feedback_exists", app.feedback_exists, reg, branch, sec, rec.faculty_name, rec.subject):
+                        continue
+                    scores = [random.randint(1, 10) for _ in range(len(app.get_questions()))]
+                    ok = timed("save_feedback", app.save_feedback, reg, branch, sec,
+                               rec.faculty_name, rec.subject, rec.department, scores, "")
+                    submitted += ok
+                    duplicates += not ok
+                if summary_every and i % summary_every == 0:
+                    timed("build_faculty_summary_for_section", app.build_faculty_summary_for_section, branch, sec)
+                with lock:
+                    counts["students"] += 1
+                    counts["submissions"] += submitted
+                    counts["duplicates"] += duplicates
+            except Exception as e:
+                with lock:
+                    counts["errors"] += 1
+                    errors[f"{type(e).__name__}: {e}"] += 1
+                    if isinstance(e, sqlite3.OperationalError) and ("locked" in str(e) or "busy" in str(e)):
+                        counts["lock_errors"] += 1
+
+    start = time.perf_counter()
+    pool = [threading.Thread(target=worker, name=f"bench-{n}") for n in range(threads)]
+    for t in pool:
+        t.start()
+    for t in pool:
+        t.join()
+    elapsed = time.perf_counter() - start
+    return {
+        "latencies": latencies, "counts": counts, "errors": dict(errors),
+        "elapsed": elapsed, "db": app.get_db().stats(),
+    }
+
+
+def process_main(env, logins, threads, summary_every, deadline_in):
+    os.environ.update(env)
+    return run_workers(logins, threads, summary_every, time.monotonic() + deadline_in)
+
+
+def summarize(results, threads, processes):
+    lat = {op: [x for r in results for x in r["latencies"][op]] for op in OPERATIONS}
+    counts = {k: sum(r["counts"][k] for r in results) for k in results[0]["counts"]}
+    elapsed = max(r["elapsed"] for r in results)
+    db = {k: sum(r["db"][k] for r in results) for k in ("transactions", "lock_waits", "lock_errors")}
+    db["max_lock_wait_s"] = max(r["db"]["max_lock_wait_s"] for r in results)
+    errors = Counter()
+    for r in results:
+        errors.update(r["errors"])
+
+    out = {
+        "threads": threads,
+        "processes": processes,
+        "elapsed_s": round(elapsed, 3),
+        **counts,
+        "students_per_s": round(counts["students"] / elapsed, 1),
+        "submissions_per_s": round(counts["submissions"] / elapsed, 1),
+        "db": db,
+        "error_messages": dict(errors.most_common()),
+        "latency_ms": {},
+    }
+    for op, xs in lat.items():
+        if xs:
+            p50, p95, p99 = np.percentile(np.array(xs) * 1000, [50, 95, 99])
+            out["latency_ms"][op] = {
+                "n": len(xs), "p50": round(p50, 2), "p95": round(p95, 2),
+                "p99": round(p99, 2), "max": round(max(xs) * 1000, 2),
+            }
+    return out
+
+
+def print_report(r):
+    print(f"\n{r['threads']} threads x {r['processes']} process(es), {r['elapsed_s']}s")
+    print(f"{'operation':<36}{'n':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+    for op, s in r["latency_ms"].items():
+        print(f"{op:<36}{s['n']:>8}{s['p50']:>10}{s['p95']:>10}{s['p99']:>10}{s['max']:>10}")
+    print(f"\nstudents: {r['students']} ({r['students_per_s']}/s)   "
+          f"submissions: {r['submissions']} ({r['submissions_per_s']}/s)")
+    print(f"duplicates: {r['duplicates']}   auth failures: {r['auth_failures']}   "
+          f"errors: {r['errors']}   lock errors: {r['lock_errors']}")
+    db = r["db"]
+    print(f"transactions: {db['transactions']}   lock waits: {db['lock_waits']} "
+          f"(max {db['max_lock_wait_s'] * 1000:.1f} ms)   pool lock errors: {db['lock_errors']}")
+    if r["error_messages"]:
+        print("\nerrors by type:")
+        for message, n in list(r["error_messages"].items())[:10]:
+            print(f"{n:>8}  {message}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Concurrent submission load test on synthetic rosters.")
+    parser.add_argument("--threads", type=int, default=16, help="worker threads per process")
+    parser.add_argument("--processes", type=int, default=1, help="processes sharing one database")
+    parser.add_argument("--branches", type=int, default=4)
+    parser.add_argument("--sections", type=int, default=3, help="sections per branch (0 for none)")
+    parser.add_argument("--students", type=int, default=50, help="students per section")
+    parser.add_argument("--faculty", type=int, default=11, help="faculty/subject rows per section")
+    parser.add_argument("--summary-every", type=int, default=10, help="students per HOD summary view (0 = never)")
+    parser.add_argument("--duration", type=float, default=120, help="stop after this many seconds")
+    parser.add_argument("--inline-writes", action="store_true", help="SJCET_BATCH_WRITES=0 (no writer thread)")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--keep", action="store_true", help="keep the temporary data directory")
+    parser.add_argument("--json", help="also write the results to this file")
+    args = parser.parse_args(argv)
+
+    workdir = Path(tempfile.mkdtemp(prefix="sjcet_bench_"))
+    try:
+        logins = write_rosters(workdir, args.branches, args.sections, args.students, args.faculty, args.seed)
+        env = {
+            "SJCET_STUDENTS_DIR": str(workdir / "students_list"),
+            "SJCET_FACULTY_DIR": str(workdir / "faculty_list"),
+            "SJCET_ROSTER_CACHE_DIR": str(workdir / ".roster_cache"),
+            "SJCET_DB_PATH": str(workdir / "feedback.db"),
+            "SJCET_BATCH_WRITES": "0" if args.inline_writes else "1",
+        }
+        print(f"{len(logins)} synthetic students, {args.faculty} faculty rows per section, data in {workdir}")
+
+        if args.processes == 1:
+            os.environ.update(env)
+            results = [run_workers(logins, args.threads, args.summary_every, time.monotonic() + args.duration)]
+        else:
+            shares = [logins[i::args.processes] for i in range(args.processes)]
+            with ProcessPoolExecutor(args.processes) as ex:
+                futures = [
+                    ex.submit(process_main, env, share, args.threads, args.summary_every, args.duration)
+                    for share in shares
+                ]
+                results = [f.result() for f in futures]
+
+        report = summarize(results, args.threads, args.processes)
+        print_report(report)
+        if args.json:
+            Path(args.json).write_text(json.dumps(report, indent=2))
+    finally:
+        if args.keep:
+            print(f"Data kept in {workdir}")
+        else:
+            shutil.rmtree(workdir, ignore_errors=True)
+    return 1 if report["errors"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,14 @@
+# ============================================================
+#              SJCET FEEDBACK SYSTEM - ERRORS
+# ============================================================
+"""Exceptions raised by the data layer in app.py.
+
+They live in their own module because Streamlit re-executes app.py as a
+fresh module on every rerun. A class defined there is a new class on each
+rerun, so an ``except`` in one rerun would not catch the exception raised
+by the feedback writer thread that an earlier rerun started.
+"""
+
+
+class FeedbackClosed(RuntimeError):
+    """A submission arrived while no feedback cycle is open."""
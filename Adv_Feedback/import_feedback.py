@@ -0,0 +1,175 @@
+# ============================================================
+#              SJCET FEEDBACK SYSTEM - BULK IMPORT
+# ============================================================
+"""Load historical / offline feedback from a CSV or JSONL file.
+
+    python import_feedback.py submissions.csv [--batch-size 5000] [--dry-run]
+
+Each record needs ``regd_no``, ``branch_code``, ``section`` (blank when the
+branch has none), ``faculty_name``, ``subject`` and the scores, either as
+``q_scores`` ("8,9,10,...", or a list in JSONL) or as ``q1`` ... ``qN`` columns.
+``comments``, ``created_at`` (ISO timestamp) and ``duration_s`` (seconds
+spent on the form, used by the anomaly scan) are optional.
+
+Students are checked against students_list, faculty/subject against
+faculty_list for that section, and scores against the current questions.
+Rows a student already submitted are skipped, same as the feedback form.
+Rows go into the currently open feedback cycle.
+Set SJCET_DB_PATH to import into a database other than feedback.db.
+"""
+
+import argparse
+import csv
+import json
+import sys
+import time
+from collections import Counter
+from datetime import datetime
+from itertools import islice
+from pathlib import Path
+
+import app
+
+MAX_REPORTED_ERRORS = 20
+
+
+class InvalidRow(ValueError):
+    pass
+
+
+def read_records(path):
+    """Yield (line_no, dict) from a .csv or .jsonl file without loading it whole."""
+    path = Path(path)
+    with path.open(newline="", encoding="utf-8-sig") as f:
+        if path.suffix.lower() in (".jsonl", ".ndjson", ".json"):
+            for line_no, line in enumerate(f, 1):
+                if line.strip():
+                    yield line_no, json.loads(line)
+        else:
+            for line_no, rec in enumerate(csv.DictReader(f), 2):
+                yield line_no, rec
+
+
+def field(rec, name):
+    value = rec.get(name)
+    return "" if value is None else str(value).strip()
+
+
+def parse_scores(rec, nq):
+    raw = rec.get("q_scores")
+    if raw is None or raw == "":
+        raw = [rec.get(f"q{i}") for i in range(1, nq + 1)]
+    elif isinstance(raw, str):
+        raw = raw.split(",")
+    try:
+        scores = [int(str(x).strip()) for x in raw]
+    except (TypeError, ValueError):
+        raise InvalidRow("scores must be integers")
+    if len(scores) != nq:
+        raise InvalidRow(f"expected {nq} scores, got {len(scores)}")
+    if any(x < 1 or x > 10 for x in scores):
+        raise InvalidRow("scores must be between 1 and 10")
+    return scores
+
+
+class RowValidator:
+    """Turns input records into insert_feedback_rows tuples, checked against the rosters."""
+
+    def __init__(self):
+        self.students = app.students.index
+        fac = app.faculty_df
+        # Matched on trimmed names, stored with the roster's exact spelling like the form does
+        self.faculty = {
+            (b, s, f.strip(), sub.strip()): (f, sub, dept)
+            for b, s, f, sub, dept in zip(
+                fac["branch_code"], fac["section"], fac["faculty_name"], fac["subject"], fac["department"]
+            )
+        }
+        self.nq = len(app.get_questions())
+
+    def __call__(self, rec):
+        reg = field(rec, "regd_no").upper() or field(rec, "student_regd_no").upper()
+        branch = field(rec, "branch_code")
+        sec = app.norm_section(field(rec, "section"))
+        fac = field(rec, "faculty_name")
+        sub = field(rec, "subject")
+
+        if (reg, branch, sec) not in self.students:
+            raise InvalidRow(f"unknown student {reg} in {branch} {sec}".rstrip())
+        match = self.faculty.get((branch, sec, fac, sub))
+        if match is None:
+            raise InvalidRow(f"{fac} does not teach {sub} in {branch} {sec}".rstrip())
+        fac, sub, dept = match
+        scores = parse_scores(rec, self.nq)
+
+        created_at = field(rec, "created_at") or datetime.now().isoformat()
+        try:
+            datetime.fromisoformat(created_at)
+        except ValueError:
+            raise InvalidRow(f"bad created_at {created_at!r}")
+        duration = field(rec, "duration_s")
+        try:
+            duration = float(duration) if duration else None
+        except ValueError:
+            raise InvalidRow(f"bad duration_s {duration!r}")
+        return (reg, branch, sec, fac, sub, dept, scores, field(rec, "comments"), created_at, duration)
+
+
+def import_file(path, batch_size=5000, dry_run=False, out=sys.stdout):
+    """Validate and insert every record; returns a Counter of outcomes."""
+    cycle = app.get_open_cycle()
+    if cycle is None:
+        raise SystemExit("No feedback cycle is open; open one from the admin Cycles tab first.")
+    print(f"Importing into cycle {cycle.name}", file=out)
+    validate = RowValidator()
+    db = app.get_db()
+    counts = Counter()
+    start = time.perf_counter()
+
+    records = read_records(path)
+    for chunk in iter(lambda: list(islice(records, batch_size)), []):
+        batch = []
+        for line_no, rec in chunk:
+            try:
+                batch.append(validate(rec))
+            except InvalidRow as e:
+                counts["invalid"] += 1
+                if counts["invalid"] <= MAX_REPORTED_ERRORS:
+                    print(f"line {line_no}: {e}", file=out)
+        counts["read"] += len(chunk)
+        if batch and not dry_run:
+            # One transaction per batch; ON CONFLICT skips rows the student already submitted
+            with db.transaction() as conn:
+                results = app.insert_feedback_rows(conn.cursor(), batch)
+            counts["inserted"] += sum(results)
+            counts["duplicate"] += len(results) - sum(results)
+        elapsed = time.perf_counter() - start
+        print(f"{counts['read']} rows read, {counts['inserted']} inserted "
+              f"({counts['read'] / elapsed:,.0f} rows/s)", file=out)
+
+    elapsed = time.perf_counter() - start
+    if counts["invalid"] > MAX_REPORTED_ERRORS:
+        print(f"... {counts['invalid'] - MAX_REPORTED_ERRORS} more invalid rows", file=out)
+    print(
+        f"Done in {elapsed:.2f}s: {counts['read']} read, {counts['inserted']} inserted, "
+        f"{counts['duplicate']} already submitted, {counts['invalid']} invalid "
+        f"({counts['read'] / elapsed if elapsed else 0:,.0f} rows/s)"
+        + (" [dry run]" if dry_run else ""),
+        file=out,
+    )
+    return counts
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Bulk import feedback from CSV or JSONL.")
+    parser.add_argument("path", help="submissions file (.csv or .jsonl)")
+    parser.add_argument("--batch-size", type=int, default=5000, help="rows per transaction")
+    parser.add_argument("--dry-run", action="store_true", help="validate only, write nothing")
+    args = parser.parse_args(argv)
+
+    counts = import_file(args.path, args.batch_size, args.dry_run)
+    return 1 if counts["invalid"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,187 @@
+# ============================================================
+#          SJCET FEEDBACK SYSTEM - SUMMARY ENGINE TESTS
+# ============================================================
+"""The section summary must give the same numbers as the original row-by-row code,
+except question-wise averages, which are now taken over every response.
+
+    python -m pytest -q test_summary.py
+
+Random submissions for every faculty/subject in the real faculty_list are
+written to a temporary database (SJCET_DB_PATH), so feedback.db is never
+touched.
+"""
+
+import os
+import random
+import shutil
+import tempfile
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+WORKDIR = Path(tempfile.mkdtemp(prefix="sjcet_test_"))
+os.environ["SJCET_DB_PATH"] = str(WORKDIR / "feedback.db")
+os.environ["SJCET_ROSTER_CACHE_DIR"] = str(WORKDIR / ".roster_cache")
+os.environ["SJCET_BATCH_WRITES"] = "0"
+
+import app  # noqa: E402  (after the SJCET_* environment is set)
+
+SUBMISSIONS = 3000
+
+
+def baseline_summary(fb, f, question_texts):
+    """The original build_faculty_summary_for_section, kept as the reference.
+
+    Expands q_scores row by row and averages per faculty with iterrows.
+    Returns (fac_summary_df, q_avg_df, fac_overall_df) or (None, None, None).
+    """
+    nq = len(question_texts)
+    labels = [f"Q{i}" for i in range(1, nq+1)]
+    def exp(row):
+        arr = [int(x) for x in str(row["q_scores"]).split(",")]
+        while len(arr) < nq:
+            arr.append(None)
+        return pd.Series(arr, index=labels)
+
+    fb_full = pd.concat([fb, fb.apply(exp, axis=1)], axis=1)
+
+    summary_rows = []
+    for _, prof in f.iterrows():
+        d = fb_full[
+            (fb_full["faculty_name"] == prof["faculty_name"]) &
+            (fb_full["subject"] == prof["subject"])
+        ]
+        if d.empty:
+            continue
+
+        row = {
+            "Faculty": prof["faculty_name"],
+            "Subject": prof["subject"],
+            "Department": prof["department"],
+            "Responses": len(d),
+        }
+        q_avgs = []
+        for i in range(1, nq+1):
+            col_q = f"Q{i}"
+            avg_i = d[col_q].mean()
+            row[f"Q{i}_avg"] = round(avg_i, 2)
+            q_avgs.append(avg_i)
+        overall = sum(q_avgs) / len(q_avgs) if q_avgs else 0
+        row["Overall Avg"] = round(overall, 2)
+        row["Overall %"] = round((overall / 10) * 100, 1)
+        row["Emoji"] = app.score_to_emoji(overall)
+        summary_rows.append(row)
+
+    if not summary_rows:
+        return None, None, None
+
+    fac_summary_df = pd.DataFrame(summary_rows)
+
+    qs_rows = []
+    for i, text in enumerate(question_texts, start=1):
+        col = f"Q{i}_avg"
+        if col in fac_summary_df.columns:
+            qs_rows.append({
+                "Question": text,
+                "Average Score": fac_summary_df[col].mean()
+            })
+    q_avg_df = pd.DataFrame(qs_rows)
+
+    fac_overall_df = fac_summary_df[[
+        "Faculty","Subject","Department","Responses","Overall Avg","Overall %","Emoji"
+    ]].copy()
+
+    return fac_summary_df, q_avg_df, fac_overall_df
+
+
+def question_stats(fb, question_texts):
+    """Question-wise statistics over every response in the section, straight from q_scores."""
+    scores = fb["q_scores"].str.split(",", expand=True).iloc[:, :len(question_texts)].astype(float)
+    n, mean, sd = scores.count(), scores.mean(), scores.std()
+    return pd.DataFrame({
+        "Question": question_texts,
+        "Responses": n.to_numpy(),
+        "Average Score": mean.round(2).to_numpy(),
+        "Std Dev": sd.round(2).to_numpy(),
+        "Median": scores.median().to_numpy(),
+        "95% CI Low": (mean - app.Z_95 * sd / np.sqrt(n)).round(2).to_numpy(),
+        "95% CI High": (mean + app.Z_95 * sd / np.sqrt(n)).round(2).to_numpy(),
+    })
+
+
+def section_feedback(branch, sec):
+    with app.get_db().connection() as conn:
+        return pd.read_sql_query(
+            "SELECT faculty_name, subject, q_scores FROM feedback WHERE branch_code=? AND section=? ORDER BY id",
+            conn, params=(branch, app.norm_section(sec)),
+        )
+
+
+@pytest.fixture(scope="module")
+def sections():
+    """Seed random submissions once; yields every (branch, section) in the faculty roster."""
+    rng = random.Random(11)
+    nq = len(app.get_questions())
+    records = [(b, s, rec) for (b, s), recs in app.faculty.by_section.items() for rec in recs]
+    # Each faculty/subject gets its own typical score so averages cover every emoji band
+    centre = {id(rec): rng.randint(1, 10) for _, _, rec in records}
+    rows = []
+    for n in range(SUBMISSIONS):
+        branch, sec, rec = rng.choice(records)
+        scores = [min(10, max(1, centre[id(rec)] + rng.randint(-2, 2))) for _ in range(nq)]
+        rows.append((
+            f"T{n:05d}", branch, sec, rec.faculty_name, rec.subject, rec.department,
+            scores, "", datetime.now().isoformat(), None,
+        ))
+    with app.get_db().transaction() as conn:
+        app.insert_feedback_rows(conn.cursor(), rows)
+    yield sorted(app.faculty.by_section)
+    shutil.rmtree(WORKDIR, ignore_errors=True)
+
+
+def test_matches_baseline(sections):
+    question_texts = [q.question_text for q in app.get_questions()]
+    for branch, sec in sections:
+        _, fac_summary_df, _, fac_overall_df, _ = app.compute_faculty_summary(branch, sec)
+        f = app.section_faculty_df(branch, sec)
+        expected_summary, _, expected_overall = baseline_summary(section_feedback(branch, sec), f, question_texts)
+
+        assert (fac_summary_df is None) == (expected_summary is None), (branch, sec)
+        if expected_summary is None:
+            continue
+        pd.testing.assert_frame_equal(fac_summary_df, expected_summary, check_dtype=False, atol=1e-9)
+        pd.testing.assert_frame_equal(fac_overall_df, expected_overall, check_dtype=False, atol=1e-9)
+
+
+def test_question_averages_weight_every_response(sections):
+    # Unlike the baseline, which averaged the rounded per-faculty means
+    question_texts = [q.question_text for q in app.get_questions()]
+    for branch, sec in sections:
+        fb = section_feedback(branch, sec)
+        if fb.empty:
+            continue
+        _, _, q_avg_df, _, _ = app.compute_faculty_summary(branch, sec)
+        pd.testing.assert_frame_equal(q_avg_df, question_stats(fb, question_texts), check_dtype=False, atol=1e-9)
+
+
+def test_cached_summary_is_the_computed_one(sections):
+    branch, sec = sections[0]
+    cached = app.build_faculty_summary_for_section(branch, sec)
+    computed = app.compute_faculty_summary(branch, sec)
+    for got, expected in zip(cached[1:], computed[1:]):
+        pd.testing.assert_frame_equal(got, expected)
+    assert np.isclose(cached[3]["Responses"].sum(), len(section_feedback(branch, sec)))
+
+
+def test_college_summary_merges_each_teachers_sections(sections):
+    ranking = app.compute_college_summary()
+    assert ranking["Faculty"].is_unique
+    # faculty_list spells her "G. Ruth Saleena " in II-CSE A and without the space elsewhere
+    ruth = ranking.loc[ranking["Faculty"] == "G. Ruth Saleena"].iloc[0]
+    assert "II-CSE A" in ruth["Sections"] and "II-CSD" in ruth["Sections"]
+    with app.get_db().connection() as conn:
+        (total,) = conn.execute("SELECT COUNT(*) FROM feedback").fetchone()
+    assert ranking["Responses"].sum() == total